@@ -12,6 +12,7 @@ YES bets are valued at yes_price; NO bets (pro-Trump on NO side) at no_price.
 
 import json
 import sys
+from collections import deque
 import numpy as np
 import pandas as pd
 from scipy import stats
@@ -85,7 +86,7 @@ def build_equity_curve(trades_raw, snaps_raw):
     all_dates = sorted(set(opens["date"]) | set(daily["date"]))
     date_range = pd.date_range(min(all_dates), max(all_dates), freq="D").date
 
-    # --- FIFO lots: (market_id, side) -> list of (qty, entry_price) ---
+    # --- FIFO lots: (market_id, side) -> deque of (qty, entry_price) ---
     lots = {}
     realized_pnl = 0.0
     price_lookup = {}   # (market_id, date) -> {yes_price, no_price}
@@ -124,7 +125,7 @@ def build_equity_curve(trades_raw, snaps_raw):
                         realized_pnl += matched * (close_price - ep)
                         lots[key][0] = (q - matched, ep)
                         if lots[key][0][0] < 1e-9:
-                            lots[key].pop(0)
+                            lots[key].popleft()
                         remaining -= matched
 
         # process new opens
@@ -132,7 +133,7 @@ def build_equity_curve(trades_raw, snaps_raw):
             for row in opens_by_date.get_group(d).itertuples(index=False):
                 key = (row.market_id, row.side)
                 if key not in lots:
-                    lots[key] = []
+                    lots[key] = deque()
                 lots[key].append((row.quantity, row.price))
 
         # mark to market
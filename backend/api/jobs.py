@@ -35,6 +35,13 @@ async def run_dca(request: Request):
     return result
 
 
+@router.post("/jobs/backfill-notional")
+async def backfill_notional(request: Request):
+    """One-off: add notional fields to paper trades written before they existed."""
+    svc = request.app.state.paper_trading_service
+    return await svc.backfill_notional()
+
+
 @router.get("/jobs/status")
 async def get_job_status(request: Request):
     scheduler = request.app.state.scheduler
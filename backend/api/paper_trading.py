@@ -18,6 +18,17 @@ async def open_trade(request: Request, body: OpenTradeRequest):
         raise HTTPException(400, str(e))
 
 
+@router.post("/paper_trades/bulk_open")
+async def bulk_open_trades(request: Request, body: list[OpenTradeRequest]):
+    """Returns only the trades that were written; any left out failed and can be resent."""
+    svc = request.app.state.paper_trading_service
+    try:
+        trades = await svc.bulk_open_trades(body)
+        return [t.model_dump(mode="json") for t in trades]
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
 @router.post("/paper_trades/close")
 async def close_trade(request: Request, body: CloseTradeRequest):
     svc = request.app.state.paper_trading_service
@@ -28,6 +39,17 @@ async def close_trade(request: Request, body: CloseTradeRequest):
         raise HTTPException(400, str(e))
 
 
+@router.post("/paper_trades/bulk_close")
+async def bulk_close_trades(request: Request, body: list[CloseTradeRequest]):
+    """Returns only the trades that were written; any left out failed and can be resent."""
+    svc = request.app.state.paper_trading_service
+    try:
+        trades = await svc.bulk_close_trades(body)
+        return [t.model_dump(mode="json") for t in trades]
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
 @router.get("/paper_positions")
 async def get_positions(request: Request):
     svc = request.app.state.paper_trading_service
@@ -13,6 +13,13 @@ async def get_tracked_markets(request: Request):
     return await svc.get_tracked_markets()
 
 
+@router.post("/tracked_markets")
+async def set_tracking_many(request: Request, body: dict[str, TrackedMarketUpdate]):
+    """Update many tracking configs; markets missing from the response failed to write."""
+    svc = request.app.state.tracking_service
+    return await svc.set_many(body)
+
+
 @router.post("/tracked_markets/{market_id}")
 async def set_tracking(request: Request, market_id: str, body: TrackedMarketUpdate):
     svc = request.app.state.tracking_service
@@ -8,6 +8,12 @@ API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 EXPORT_DIR = os.getenv("EXPORT_DIR", "/exports")
+# Seconds the paper-trading service reuses its trade list / position aggregates.
+# Its own open/close writes invalidate them; DCA and CLOB backfill trades appear
+# once they expire (eventually consistent by up to this long)
+PAPER_TRADES_CACHE_TTL = float(os.getenv("PAPER_TRADES_CACHE_TTL", "3"))
+# Seconds SettingsService.get() serves its cached settings doc; updates invalidate it
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "30"))
 
 # Experiment closed on this date — all equity curves and stats are capped here.
 EXPERIMENT_END_DATE = "2026-05-01"
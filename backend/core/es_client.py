@@ -1,17 +1,34 @@
 """Elasticsearch client wrapper with bulk operations and index management."""
 
 import logging
-from typing import Any
+from typing import Any, AsyncIterator
 
 from elasticsearch import AsyncElasticsearch, NotFoundError
-from elasticsearch.helpers import async_bulk
+from elasticsearch.helpers import async_streaming_bulk
+from elasticsearch.serializer import NdjsonSerializer
 
 logger = logging.getLogger(__name__)
 
+try:
+    from elasticsearch.serializer import OrjsonSerializer
+
+    class OrjsonNdjsonSerializer(NdjsonSerializer, OrjsonSerializer):
+        """NDJSON (_bulk/_msearch) bodies encoded line by line with orjson."""
+
+    # Types orjson can't encode natively still go through the client's default()
+    SERIALIZERS = {
+        OrjsonSerializer.mimetype: OrjsonSerializer(),
+        OrjsonNdjsonSerializer.mimetype: OrjsonNdjsonSerializer(),
+    }
+except ImportError:  # orjson not installed — keep the stdlib json serializers
+    SERIALIZERS = {}
+
 
 class ESClient:
     def __init__(self, hosts: list[str], timeout: int = 30):
-        self.client = AsyncElasticsearch(hosts=hosts, request_timeout=timeout)
+        self.client = AsyncElasticsearch(
+            hosts=hosts, request_timeout=timeout, serializers=SERIALIZERS
+        )
 
     async def close(self):
         await self.client.close()
@@ -36,8 +53,19 @@ class ESClient:
         logger.info("Created index: %s", name)
         return True
 
-    async def index_doc(self, index: str, doc_id: str, body: dict) -> dict:
-        return await self.client.index(index=index, id=doc_id, document=body)
+    async def index_doc(
+        self, index: str, doc_id: str, body: dict, refresh: str | bool = False
+    ) -> dict:
+        return await self.client.index(index=index, id=doc_id, document=body, refresh=refresh)
+
+    async def create_doc(self, index: str, body: dict, refresh: str | bool = False) -> str:
+        """Index an append-only doc under an ES-generated _id; returns that _id.
+
+        With no client-supplied ID, ES skips the per-shard existence lookup
+        that an explicit-ID index (an upsert) has to do.
+        """
+        result = await self.client.index(index=index, document=body, refresh=refresh)
+        return result["_id"]
 
     async def get(self, index: str, doc_id: str) -> dict | None:
         try:
@@ -46,8 +74,25 @@ class ESClient:
         except NotFoundError:
             return None
 
-    async def update(self, index: str, doc_id: str, body: dict) -> dict:
-        return await self.client.update(index=index, id=doc_id, doc=body)
+    async def update(
+        self, index: str, doc_id: str, body: dict, refresh: str | bool = False
+    ) -> dict:
+        return await self.client.update(index=index, id=doc_id, doc=body, refresh=refresh)
+
+    async def update_doc(
+        self, index: str, doc_id: str, doc: dict, upsert: dict | None = None
+    ) -> dict | None:
+        """Partial-update a doc in one _update round-trip and return its new _source.
+
+        If the doc is missing, `upsert` is indexed as-is; without one, returns None.
+        """
+        try:
+            result = await self.client.update(
+                index=index, id=doc_id, doc=doc, upsert=upsert, source=True
+            )
+        except NotFoundError:
+            return None
+        return result["get"]["_source"]
 
     async def delete(self, index: str, doc_id: str) -> bool:
         try:
@@ -64,15 +109,198 @@ class ESClient:
         size: int = 100,
         from_: int = 0,
         collapse: str | None = None,
+        source: list[str] | None = None,
+        docvalue_fields: list[str] | None = None,
+        track_total_hits: bool | int | None = None,
+        pre_filter_shard_size: int | None = None,
     ) -> dict:
         body: dict[str, Any] = {"size": size, "from": from_}
+        if track_total_hits is not None:
+            body["track_total_hits"] = track_total_hits
         if query:
             body["query"] = query
         if sort:
             body["sort"] = sort
         if collapse:
             body["collapse"] = {"field": collapse}
-        return await self.client.search(index=index, body=body)
+        if source is not None:
+            body["_source"] = source
+        if docvalue_fields:
+            body["docvalue_fields"] = docvalue_fields
+        params: dict[str, Any] = {}
+        if pre_filter_shard_size is not None:
+            # Force the can_match pre-phase so shards outside a range query are skipped
+            params["pre_filter_shard_size"] = pre_filter_shard_size
+        return await self.client.search(index=index, body=body, **params)
+
+    async def msearch(
+        self,
+        index: str,
+        bodies: list[dict],
+        request_cache: bool | None = None,
+        pre_filter_shard_size: int | None = None,
+    ) -> list[dict]:
+        """Run several search bodies against one index in a single _msearch round-trip.
+
+        Returns the per-body responses in order; a failed sub-search raises.
+        `request_cache` is set on every sub-search header when given.
+        """
+        if not bodies:
+            return []
+        header: dict[str, Any] = {"index": index}
+        if request_cache is not None:
+            header["request_cache"] = request_cache
+        searches: list[dict] = []
+        for body in bodies:
+            searches.append(header)
+            searches.append(body)
+        params: dict[str, Any] = {}
+        if pre_filter_shard_size is not None:
+            params["pre_filter_shard_size"] = pre_filter_shard_size
+        result = await self.client.msearch(searches=searches, **params)
+        responses = result["responses"]
+        for resp in responses:
+            if "error" in resp:
+                raise RuntimeError(f"msearch sub-request failed: {resp['error']}")
+        return responses
+
+    async def iter_hits(
+        self,
+        index: str,
+        sort: list,
+        query: dict | None = None,
+        page_size: int = 1000,
+        source: list[str] | None = None,
+    ) -> AsyncIterator[dict]:
+        """Yield every matching hit, paging with search_after.
+
+        `sort` must end in a unique tiebreaker field so pages never overlap.
+        """
+        search_after = None
+        while True:
+            body: dict[str, Any] = {"size": page_size, "sort": sort, "track_total_hits": False}
+            if query:
+                body["query"] = query
+            if source is not None:
+                body["_source"] = source
+            if search_after:
+                body["search_after"] = search_after
+            result = await self.client.search(index=index, body=body)
+            hits = result["hits"]["hits"]
+            for hit in hits:
+                yield hit
+            if len(hits) < page_size:
+                return
+            search_after = hits[-1]["sort"]
+
+    async def search_all(
+        self,
+        index: str,
+        sort: list,
+        query: dict | None = None,
+        page_size: int = 1000,
+        source: list[str] | None = None,
+    ) -> list[dict]:
+        """Collect the _source of every matching hit via iter_hits."""
+        return [
+            hit["_source"]
+            async for hit in self.iter_hits(index, sort, query, page_size, source)
+        ]
+
+    async def latest_metrics(
+        self,
+        index: str,
+        query: dict,
+        fields: list[str],
+        sort_field: str = "timestamp_utc",
+    ) -> dict | None:
+        """Return {field: value} for the newest doc matching query, or None.
+
+        Uses size:0 + a top_metrics agg, so ES skips the fetch phase entirely.
+        """
+        body = {
+            "size": 0,
+            "query": query,
+            "aggs": {
+                "latest": {
+                    "top_metrics": {
+                        "metrics": [{"field": f} for f in fields],
+                        "sort": {sort_field: "desc"},
+                    }
+                }
+            },
+        }
+        result = await self.client.search(index=index, body=body)
+        top = result["aggregations"]["latest"]["top"]
+        return top[0]["metrics"] if top else None
+
+    async def latest_metrics_by(
+        self,
+        index: str,
+        query: dict,
+        fields: list[str],
+        group_field: str,
+        size: int,
+        sort_field: str = "timestamp_utc",
+    ) -> dict[str, dict]:
+        """Return {group_key: {field: value}} for the newest doc per group_field value."""
+        body = {
+            "size": 0,
+            "query": query,
+            "aggs": {
+                "groups": {
+                    "terms": {"field": group_field, "size": max(size, 1)},
+                    "aggs": {
+                        "latest": {
+                            "top_metrics": {
+                                "metrics": [{"field": f} for f in fields],
+                                "sort": {sort_field: "desc"},
+                            }
+                        }
+                    },
+                }
+            },
+        }
+        result = await self.client.search(index=index, body=body)
+        latest = {}
+        for bucket in result["aggregations"]["groups"]["buckets"]:
+            top = bucket["latest"]["top"]
+            if top:
+                latest[bucket["key"]] = top[0]["metrics"]
+        return latest
+
+    async def composite_buckets(
+        self,
+        index: str,
+        query: dict,
+        sources: list[dict],
+        aggs: dict | None = None,
+        page_size: int = 1000,
+    ) -> list[dict]:
+        """Return every bucket of a composite aggregation, following after_key pages."""
+        buckets: list[dict] = []
+        after_key = None
+        while True:
+            composite: dict[str, Any] = {"size": page_size, "sources": sources}
+            if after_key:
+                composite["after"] = after_key
+            agg: dict[str, Any] = {"composite": composite}
+            if aggs:
+                agg["aggs"] = aggs
+            body = {"size": 0, "query": query, "aggs": {"groups": agg}}
+            result = await self.client.search(index=index, body=body)
+            groups = result["aggregations"]["groups"]
+            buckets.extend(groups["buckets"])
+            after_key = groups.get("after_key")
+            if not after_key or len(groups["buckets"]) < page_size:
+                return buckets
+
+    async def update_by_query(self, index: str, query: dict, script: dict) -> int:
+        """Apply a script to every doc matching query; returns the number updated."""
+        result = await self.client.update_by_query(
+            index=index, query=query, script=script, conflicts="proceed", refresh=True
+        )
+        return result.get("updated", 0)
 
     async def count(self, index: str, query: dict | None = None) -> int:
         body = {"query": query} if query else {}
@@ -91,9 +319,16 @@ class ESClient:
         }
 
     async def bulk_index(
-        self, index: str, documents: list[dict], id_field: str | None = None
+        self,
+        index: str,
+        documents: list[dict],
+        id_field: str | None = None,
+        refresh: str | bool = False,
     ) -> dict:
-        """Bulk index documents. If id_field is set, use that field as the ES doc _id."""
+        """Bulk index documents. If id_field is set, use that field as the ES doc _id.
+
+        Returns {"success", "errors", "ok"} with one ok flag per document, in order.
+        """
         actions = []
         for doc in documents:
             action = {"_index": index, "_source": doc}
@@ -102,16 +337,7 @@ class ESClient:
             elif "_id" in doc:
                 action["_id"] = doc.pop("_id")
             actions.append(action)
-
-        success, errors = await async_bulk(
-            self.client,
-            actions,
-            chunk_size=500,
-            raise_on_error=False,
-        )
-        if errors:
-            logger.warning("Bulk index had %d errors", len(errors))
-        return {"success": success, "errors": len(errors) if errors else 0}
+        return await self._bulk(actions, "Bulk index", refresh=refresh)
 
     async def bulk_upsert(
         self, index: str, documents: list[dict], id_field: str
@@ -123,13 +349,32 @@ class ESClient:
             if not doc_id:
                 continue
             actions.append({"_index": index, "_id": doc_id, "_source": doc})
+        return await self._bulk(actions, "Bulk upsert")
 
-        success, errors = await async_bulk(
-            self.client,
-            actions,
-            chunk_size=500,
-            raise_on_error=False,
-        )
+    async def bulk_actions(self, actions: list[dict], refresh: str | bool = False) -> dict:
+        """Run pre-built bulk helper actions (mixed index/update ops) in one request."""
+        return await self._bulk(actions, "Bulk actions", refresh=refresh)
+
+    async def _bulk(self, actions: list[dict], label: str, refresh: str | bool = False) -> dict:
+        """Send actions in 500-item _bulk chunks without raising on item failures.
+
+        Returns {"success", "errors", "ok"}, where ok[i] says whether actions[i] was
+        applied, so callers can tell exactly which writes landed. Transport errors
+        (connection, timeout) still raise.
+        """
+        ok: list[bool] = []
+        if actions:
+            async for item_ok, item in async_streaming_bulk(
+                self.client,
+                actions,
+                chunk_size=500,
+                raise_on_error=False,
+                refresh=refresh,
+            ):
+                ok.append(item_ok)
+                if not item_ok:
+                    logger.debug("%s item failed: %s", label, item)
+        errors = ok.count(False)
         if errors:
-            logger.warning("Bulk upsert had %d errors", len(errors))
-        return {"success": success, "errors": len(errors) if errors else 0}
+            logger.warning("%s had %d errors", label, errors)
+        return {"success": len(ok) - errors, "errors": errors, "ok": ok}
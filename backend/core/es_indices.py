@@ -33,6 +33,8 @@ MARKETS_MAPPING = {
 SNAPSHOTS_WIDE_MAPPING = {
     "mappings": {
         "properties": {
+            # Keep as a numeric date: latest-snapshot lookups sort on it with
+            # track_total_hits disabled, which lets ES skip non-competitive shards.
             "timestamp_utc": {"type": "date"},
             "market_id": {"type": "keyword"},
             "question": {
@@ -80,6 +82,9 @@ PAPER_TRADES_MAPPING = {
             "action": {"type": "keyword"},
             "quantity": {"type": "double"},
             "price": {"type": "double"},
+            # quantity * price; signed_notional is negative for CLOSE trades
+            "notional": {"type": "double"},
+            "signed_notional": {"type": "double"},
             "snapshot_ts_utc": {"type": "date"},
             "fees": {"type": "double"},
             "metadata": {"type": "object", "enabled": True},
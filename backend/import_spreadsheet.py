@@ -74,25 +74,14 @@ def read_snapshots_wide(wb) -> list[dict]:
         closed = row[11] if isinstance(row[11], bool) else str(row[11]).lower() == "true" if row[11] else False
         market_slug = str(row[12] or "") if len(row) > 12 else ""
 
-        # Parse timestamp
+        # Parse timestamp: openpyxl may hand back a datetime cell or an ISO string
+        # (with or without fractional seconds / "Z"), both of which fromisoformat reads
         try:
-            if isinstance(ts_raw, datetime):
-                ts = ts_raw.replace(tzinfo=timezone.utc) if ts_raw.tzinfo is None else ts_raw
-            else:
-                ts_str = ts_raw.replace("+00:00", "Z").rstrip("Z")
-                # Try parsing with microseconds
-                for fmt in ["%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S"]:
-                    try:
-                        ts = datetime.strptime(ts_str, fmt).replace(tzinfo=timezone.utc)
-                        break
-                    except ValueError:
-                        continue
-                else:
-                    logger.warning("Cannot parse timestamp: %s", ts_raw)
-                    continue
-        except Exception as e:
-            logger.warning("Timestamp parse error: %s (%s)", ts_raw, e)
+            ts = row[0] if isinstance(row[0], datetime) else datetime.fromisoformat(ts_raw)
+        except ValueError:
+            logger.warning("Cannot parse timestamp: %s", ts_raw)
             continue
+        ts = ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
 
         doc_id = generate_snapshot_doc_id(ts, market_id)
         doc = {
@@ -241,6 +230,8 @@ def read_paper_trades(wb) -> list[dict]:
             except (json.JSONDecodeError, TypeError):
                 metadata = {}
 
+        # Same precomputed fields as PaperTradingService._trade_doc
+        notional = quantity * price
         doc = {
             "trade_id": trade_id,
             "created_at_utc": created_at_utc,
@@ -252,6 +243,8 @@ def read_paper_trades(wb) -> list[dict]:
             "snapshot_ts_utc": snapshot_ts_utc,
             "fees": fees,
             "metadata": metadata,
+            "notional": notional,
+            "signed_notional": -notional if action == "CLOSE" else notional,
         }
         docs.append(doc)
 
@@ -75,6 +75,17 @@ async def lifespan(app: FastAPI):
     market_svc = MarketService(es)
     tracking_svc = TrackingService(es)
     paper_svc = PaperTradingService(es)
+    # Trades from before notional was indexed are fixed by the one-off
+    # POST /jobs/backfill-notional; startup only reports them and never blocks on it
+    try:
+        missing_notional = await paper_svc.count_missing_notional()
+        if missing_notional:
+            logger.warning(
+                "%d paper trades lack notional; position totals undercount them "
+                "until POST /jobs/backfill-notional is run", missing_notional,
+            )
+    except Exception as e:
+        logger.warning("Could not check paper trades for missing notional: %s", e)
     export_svc = ExportService(es, config.EXPORT_DIR)
     alerts_svc = AlertsService(es)
     dca_svc = DCAService(es)
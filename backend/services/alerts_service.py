@@ -108,6 +108,7 @@ class AlertsService:
                 query={"term": {"market_id": mid}},
                 sort=[{"timestamp_utc": {"order": "desc"}}],
                 size=1,
+                source=["yes_price", "no_price"],
             )
             if not snap_result["hits"]["hits"]:
                 continue
@@ -14,9 +14,11 @@ import logging
 from datetime import datetime, timezone
 
 import httpx
+import numpy as np
 
 from core.es_client import ESClient
-from utils.dedup import generate_snapshot_doc_id
+from utils.dedup import format_snapshot_ts_array, generate_snapshot_doc_ids
+from utils.filters import build_price_fields
 
 logger = logging.getLogger(__name__)
 
@@ -114,23 +116,19 @@ class ClobHistoryService:
                 if not points:
                     continue
 
-                for pt in points:
-                    if end_ts is not None and int(pt["t"]) > end_ts:
-                        continue
-                    ts = datetime.fromtimestamp(pt["t"], tz=timezone.utc)
-                    yes = round(float(pt["p"]), 6)
-                    no = round(1.0 - yes, 6)
-                    snap_id = generate_snapshot_doc_id(ts, mid)
+                if end_ts is not None:
+                    points = [pt for pt in points if int(pt["t"]) <= end_ts]
+                epochs = np.fromiter((int(pt["t"]) for pt in points), dtype=np.int64, count=len(points))
+                ts_strs = format_snapshot_ts_array(epochs)
+                snap_ids = generate_snapshot_doc_ids(epochs, mid, ts_strs=ts_strs)
+                for pt, ts_str, snap_id in zip(points, ts_strs.tolist(), snap_ids.tolist()):
+                    yes = float(pt["p"])
                     all_snapshots.append({
                         "_id": snap_id,
-                        "timestamp_utc": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        "timestamp_utc": ts_str,
                         "market_id": mid,
                         "question": doc.get("question", ""),
-                        "yes_price": yes,
-                        "no_price": no,
-                        "yes_cents": round(yes * 100),
-                        "no_cents": round(no * 100),
-                        "spread": round(abs(yes - no), 6),
+                        **build_price_fields(yes, 1.0 - yes),
                         "volumeNum": 0.0,
                         "liquidityNum": 0.0,
                         "active": doc.get("active", True),
@@ -168,12 +166,13 @@ class ClobHistoryService:
     # ── helpers ───────────────────────────────────────────────────────────────
 
     async def _load_tracked_ids(self) -> list[str]:
-        result = await self.es.search(
+        docs = await self.es.search_all(
             TRACKED_INDEX,
             query={"term": {"is_tracked": True}},
-            size=10000,
+            sort=[{"market_id": {"order": "asc"}}],
+            source=["market_id"],
         )
-        return [h["_source"]["market_id"] for h in result["hits"]["hits"]]
+        return [d["market_id"] for d in docs]
 
     async def _fetch_clob_history(self, token: str, start_ts: int) -> list[dict]:
         url = (
@@ -247,12 +246,11 @@ class ClobHistoryService:
     async def _rebackfill_all_dca(self, include_cancelled: bool = False) -> dict:
         """Delete and regenerate trades for all active (and optionally cancelled) DCA subscriptions."""
         query = {"match_all": {}} if include_cancelled else {"term": {"active": True}}
-        result = await self.es.search(
+        subs = await self.es.search_all(
             "dca_subscriptions",
+            sort=[{"dca_id": {"order": "asc"}}],
             query=query,
-            size=10000,
         )
-        subs = [h["_source"] for h in result["hits"]["hits"]]
 
         rebackfilled = 0
         errors = []
@@ -296,13 +294,13 @@ class ClobHistoryService:
         from collections import OrderedDict
         import uuid
 
-        snap_result = await self.es.search(
+        # One snapshot per (timestamp, market), so timestamp alone is a unique sort key here
+        snapshots = await self.es.search_all(
             SNAPSHOTS_INDEX,
-            query={"term": {"market_id": market_id}},
             sort=[{"timestamp_utc": {"order": "asc"}}],
-            size=10000,
+            query={"term": {"market_id": market_id}},
+            source=["timestamp_utc", "market_id", "yes_price", "no_price"],
         )
-        snapshots = [h["_source"] for h in snap_result["hits"]["hits"]]
         if not snapshots:
             return 0
 
@@ -325,6 +323,8 @@ class ClobHistoryService:
                 "action": "OPEN",
                 "quantity": quantity,
                 "price": price,
+                "notional": quantity * price,
+                "signed_notional": quantity * price,
                 "snapshot_ts_utc": snap["timestamp_utc"],
                 "fees": 0.0,
                 "metadata": {"dca": True, "dca_id": dca_id},
@@ -7,8 +7,14 @@ from datetime import datetime, timezone
 from core.es_client import ESClient
 from core.gamma_client import GammaClient
 from services.settings_service import SettingsService
-from utils.filters import is_trump_related, is_binary_yes_no, normalize_yes_no_prices
-from utils.dedup import generate_snapshot_doc_id
+from utils.filters import (
+    build_price_fields,
+    is_trump_related_lowered,
+    is_binary_yes_no,
+    normalize_yes_no_prices,
+    trump_match_keywords,
+)
+from utils.dedup import format_snapshot_ts, generate_snapshot_doc_id
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +87,7 @@ class CollectorService:
     async def _discover_markets(self, settings) -> list[dict]:
         """Discover markets from all configured tag_slugs."""
         all_markets: dict[str, dict] = {}  # keyed by market_id for dedup
+        trump_keywords = trump_match_keywords(settings.trump_keywords)
 
         for tag_slug in settings.tag_slugs:
             try:
@@ -119,7 +126,7 @@ class CollectorService:
 
                     # Filter: trump tag → all; politics → keyword filter only
                     if tag_slug != "trump":
-                        if not is_trump_related(question, settings.trump_keywords):
+                        if not is_trump_related_lowered((question or "").lower(), trump_keywords):
                             continue
 
                     # Binary filter
@@ -199,22 +206,23 @@ class CollectorService:
         tracked_ids = set()
 
         # From tracked_markets index
-        result = await self.es.search(
+        async for hit in self.es.iter_hits(
             TRACKED_INDEX,
             query={"term": {"is_tracked": True}},
-            size=10000,
-        )
-        for hit in result["hits"]["hits"]:
+            sort=[{"market_id": {"order": "asc"}}],
+            source=["market_id"],
+        ):
             tracked_ids.add(hit["_source"]["market_id"])
 
-        # Force-tracked IDs from settings
-        for mid in settings.force_tracked_ids:
-            tracked_ids.add(mid)
-            # Ensure they exist in tracked_markets
-            existing = await self.es.get(TRACKED_INDEX, mid)
-            if not existing:
-                now = datetime.now(timezone.utc).isoformat()
-                await self.es.index_doc(TRACKED_INDEX, mid, {
+        # Force-tracked IDs from settings; ensure they exist in tracked_markets
+        # with one mget and a single bulk write for the missing ones
+        force_ids = list(dict.fromkeys(settings.force_tracked_ids))
+        tracked_ids.update(force_ids)
+        if force_ids:
+            existing = await self.es.mget(TRACKED_INDEX, force_ids)
+            now = datetime.now(timezone.utc).isoformat()
+            missing_docs = [
+                {
                     "market_id": mid,
                     "is_tracked": True,
                     "stance": None,
@@ -224,7 +232,12 @@ class CollectorService:
                     "notes": "Auto-added from force_tracked_ids",
                     "created_at_utc": now,
                     "updated_at_utc": now,
-                })
+                }
+                for mid in force_ids
+                if mid not in existing
+            ]
+            if missing_docs:
+                await self.es.bulk_index(TRACKED_INDEX, missing_docs, id_field="market_id")
 
         # Filter out closed markets
         if tracked_ids:
@@ -244,6 +257,7 @@ class CollectorService:
         snapshots = []
         errors = []
         ts_iso = run_time.isoformat()
+        id_prefix = format_snapshot_ts(run_time)
         semaphore = asyncio.Semaphore(20)  # max 20 concurrent requests
 
         async def fetch_one(mid: str) -> dict | None:
@@ -285,18 +299,14 @@ class CollectorService:
                         return None
 
                     yes_price, no_price = normalize_yes_no_prices(outcomes, outcome_prices)
-                    doc_id = generate_snapshot_doc_id(run_time, mid)
+                    doc_id = generate_snapshot_doc_id(run_time, mid, ts_str=id_prefix)
 
                     return {
                         "_id": doc_id,
                         "timestamp_utc": ts_iso,
                         "market_id": mid,
                         "question": market_data.get("question", ""),
-                        "yes_price": round(yes_price, 6),
-                        "no_price": round(no_price, 6),
-                        "yes_cents": round(yes_price * 100),
-                        "no_cents": round(no_price * 100),
-                        "spread": round(abs(yes_price - no_price), 6),
+                        **build_price_fields(yes_price, no_price),
                         "volumeNum": float(market_data.get("volumeNum", 0) or 0),
                         "liquidityNum": float(market_data.get("liquidityNum", 0) or 0),
                         "active": market_data.get("active", True),
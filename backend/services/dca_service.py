@@ -1,6 +1,8 @@
 """DCA (Dollar-Cost Averaging) service — recurring daily bets with historical backfill."""
 
+import asyncio
 import logging
+import os
 import uuid
 from collections import OrderedDict
 from datetime import datetime, timezone
@@ -14,6 +16,14 @@ DCA_INDEX = "dca_subscriptions"
 PAPER_TRADES_INDEX = "paper_trades"
 SNAPSHOTS_INDEX = "snapshots_wide"
 MARKETS_INDEX = "markets"
+SNAPSHOT_PRICE_FIELDS = ["yes_price", "no_price", "timestamp_utc"]
+BACKFILL_CONCURRENCY = 12
+
+
+def batch_uuid4(n: int) -> list[str]:
+    """Generate n random (version 4) UUID strings from a single os.urandom call."""
+    buf = os.urandom(16 * n)
+    return [str(uuid.UUID(bytes=buf[i * 16:(i + 1) * 16], version=4)) for i in range(n)]
 
 
 def group_snapshots_by_day(snapshots: list[dict]) -> OrderedDict:
@@ -36,16 +46,19 @@ def build_backfill_trades(
     """Build trade documents for each daily snapshot."""
     trades = []
     side_upper = side.upper()
-    for _date_str, snap in daily_snapshots.items():
+    trade_ids = batch_uuid4(len(daily_snapshots))
+    for trade_id, snap in zip(trade_ids, daily_snapshots.values()):
         price = snap["yes_price"] if side_upper == "YES" else snap["no_price"]
         trades.append({
-            "trade_id": str(uuid.uuid4()),
+            "trade_id": trade_id,
             "created_at_utc": snap["timestamp_utc"],
             "market_id": market_id,
             "side": side_upper,
             "action": "OPEN",
             "quantity": quantity,
             "price": price,
+            "notional": quantity * price,
+            "signed_notional": quantity * price,
             "snapshot_ts_utc": snap["timestamp_utc"],
             "fees": 0.0,
             "metadata": {"dca": True, "dca_id": dca_id},
@@ -80,8 +93,6 @@ def compute_dca_analytics(
     unrealized_pnl = current_value - total_invested
     pnl_pct = (unrealized_pnl / total_invested * 100) if total_invested > 0 else 0.0
 
-    dates = [t["created_at_utc"][:10] for t in trades]
-
     return DCAAnalytics(
         dca_id=dca_id,
         market_id=market_id,
@@ -96,8 +107,8 @@ def compute_dca_analytics(
         current_value=round(current_value, 4),
         unrealized_pnl=round(unrealized_pnl, 4),
         unrealized_pnl_pct=round(pnl_pct, 2),
-        first_trade_date=dates[0] if dates else "",
-        last_trade_date=dates[-1] if dates else "",
+        first_trade_date=trades[0]["created_at_utc"][:10],
+        last_trade_date=trades[-1]["created_at_utc"][:10],
     )
 
 
@@ -119,7 +130,7 @@ class DCAService:
             created_at_utc=now,
         )
 
-        await self.es.index_doc(DCA_INDEX, dca_id, sub.model_dump(mode="json"))
+        await self.es.index_doc(DCA_INDEX, dca_id, sub.model_dump(), refresh=False)
         logger.info("Created DCA subscription %s for %s %s", dca_id, req.side, req.market_id)
 
         backfill_count = await self._backfill(dca_id, req.market_id, req.side.upper(), req.quantity)
@@ -134,13 +145,7 @@ class DCAService:
 
     async def _backfill(self, dca_id: str, market_id: str, side: str, quantity: float) -> int:
         """Backfill trades for all historical days with snapshot data."""
-        result = await self.es.search(
-            SNAPSHOTS_INDEX,
-            query={"term": {"market_id": market_id}},
-            sort=[{"timestamp_utc": {"order": "asc"}}],
-            size=10000,
-        )
-        snapshots = [h["_source"] for h in result["hits"]["hits"]]
+        snapshots = await self._first_snapshot_per_day(market_id)
 
         if not snapshots:
             logger.info("No snapshots to backfill for %s", market_id)
@@ -150,30 +155,83 @@ class DCAService:
         trades = build_backfill_trades(dca_id, market_id, side, quantity, daily)
 
         if trades:
-            await self.es.bulk_index(PAPER_TRADES_INDEX, trades, id_field="trade_id")
+            await self.es.bulk_index(PAPER_TRADES_INDEX, trades, id_field="trade_id", refresh=False)
 
+            # Update-by-id is realtime, so no refresh is needed after the index above
             last_date = list(daily.keys())[-1]
             await self.es.update(DCA_INDEX, dca_id, {
                 "last_executed_date": last_date,
                 "total_trades_placed": len(trades),
-            })
+            }, refresh=False)
 
         logger.info("Backfilled %d trades for DCA %s", len(trades), dca_id)
         return len(trades)
 
+    async def _first_snapshot_per_day(self, market_id: str) -> list[dict]:
+        """Earliest snapshot of each UTC day for a market, deduplicated in ES.
+
+        A date_histogram + top_hits(size=1, asc) returns one doc per day instead of
+        shipping every intraday snapshot (CLOB midnight still wins over Gamma).
+        """
+        result = await self.es.client.search(
+            index=SNAPSHOTS_INDEX,
+            body={
+                "size": 0,
+                "query": {"term": {"market_id": market_id}},
+                "aggs": {
+                    "by_day": {
+                        "date_histogram": {
+                            "field": "timestamp_utc",
+                            "calendar_interval": "day",
+                            "min_doc_count": 1,
+                        },
+                        "aggs": {
+                            "first": {
+                                "top_hits": {
+                                    "size": 1,
+                                    "sort": [{"timestamp_utc": {"order": "asc"}}],
+                                    "_source": SNAPSHOT_PRICE_FIELDS + ["market_id"],
+                                }
+                            }
+                        },
+                    }
+                },
+            },
+        )
+        return [
+            b["first"]["hits"]["hits"][0]["_source"]
+            for b in result["aggregations"]["by_day"]["buckets"]
+            if b["first"]["hits"]["hits"]
+        ]
+
     async def execute_daily(self, today_date: str | None = None) -> dict:
         """Execute daily DCA trades for all active subscriptions."""
         if today_date is None:
             today_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
-        result = await self.es.search(
+        subs = await self.es.search_all(
             DCA_INDEX,
             query={"term": {"active": True}},
-            size=10000,
+            sort=[{"dca_id": {"order": "asc"}}],
         )
-        subs = [h["_source"] for h in result["hits"]["hits"]]
 
-        trades_placed = 0
+        # Batch fetch market metadata + latest prices for every pending subscription
+        market_ids = list({s["market_id"] for s in subs if s.get("last_executed_date") != today_date})
+        market_map: dict[str, dict] = {}
+        price_map: dict[str, dict] = {}
+        if market_ids:
+            market_map = await self.es.mget(MARKETS_INDEX, market_ids)
+            price_map = await self.es.latest_metrics_by(
+                SNAPSHOTS_INDEX,
+                query={"terms": {"market_id": market_ids}},
+                fields=SNAPSHOT_PRICE_FIELDS,
+                group_field="market_id",
+                size=len(market_ids),
+            )
+
+        now_iso = datetime.now(timezone.utc).isoformat()
+        actions: list[dict] = []  # trade inserts + auto-cancels
+        pending: dict[int, dict] = {}  # action index of a trade insert -> its subscription update
         skipped_closed = 0
         for sub in subs:
             if sub.get("last_executed_date") == today_date:
@@ -185,53 +243,59 @@ class DCAService:
             dca_id = sub["dca_id"]
 
             # Auto-cancel DCA on closed markets
-            market = await self.es.get(MARKETS_INDEX, market_id)
+            market = market_map.get(market_id)
             if market and market.get("closed"):
                 skipped_closed += 1
-                await self.es.update(DCA_INDEX, dca_id, {"active": False})
+                actions.append({
+                    "_op_type": "update", "_index": DCA_INDEX, "_id": dca_id,
+                    "doc": {"active": False},
+                })
                 logger.info("Auto-cancelled DCA %s — market %s is closed", dca_id, market_id)
                 continue
 
-            # Find latest snapshot for this market
-            snap_result = await self.es.search(
-                SNAPSHOTS_INDEX,
-                query={"term": {"market_id": market_id}},
-                sort=[{"timestamp_utc": {"order": "desc"}}],
-                size=1,
-            )
-            snaps = [h["_source"] for h in snap_result["hits"]["hits"]]
-            if not snaps:
+            snap = price_map.get(market_id)
+            if not snap:
                 logger.warning("No snapshot for DCA %s market %s, skipping", dca_id, market_id)
                 continue
 
-            snap = snaps[0]
             price = snap["yes_price"] if side == "YES" else snap["no_price"]
 
             trade = {
-                "trade_id": str(uuid.uuid4()),
-                "created_at_utc": datetime.now(timezone.utc).isoformat(),
+                # One ID per subscription per day: re-running a day overwrites, never duplicates
+                "trade_id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"dca:{dca_id}:{today_date}")),
+                "created_at_utc": now_iso,
                 "market_id": market_id,
                 "side": side,
                 "action": "OPEN",
                 "quantity": quantity,
                 "price": price,
+                "notional": quantity * price,
+                "signed_notional": quantity * price,
                 "snapshot_ts_utc": snap["timestamp_utc"],
                 "fees": 0.0,
                 "metadata": {"dca": True, "dca_id": dca_id},
             }
 
-            await self.es.index_doc(PAPER_TRADES_INDEX, trade["trade_id"], trade)
-
             total = sub.get("total_trades_placed", 0) + 1
-            await self.es.update(DCA_INDEX, dca_id, {
-                "last_executed_date": today_date,
-                "total_trades_placed": total,
+            pending[len(actions)] = {
+                "_op_type": "update", "_index": DCA_INDEX, "_id": dca_id,
+                "doc": {"last_executed_date": today_date, "total_trades_placed": total},
+            }
+            actions.append({
+                "_op_type": "index", "_index": PAPER_TRADES_INDEX, "_id": trade["trade_id"],
+                "_source": trade,
             })
-
-            trades_placed += 1
             logger.info("DCA daily trade for %s: %s %s @ %.4f", dca_id, side, market_id, price)
 
-        return {"subscriptions_processed": len(subs), "trades_placed": trades_placed, "skipped_closed": skipped_closed}
+        # One bulk request for the trade inserts, then a second marking executed only
+        # the subscriptions whose trade was written; a failed trade is retried next run
+        result = await self.es.bulk_actions(actions, refresh=False)
+        updates = [update for i, update in pending.items() if result["ok"][i]]
+        if len(updates) < len(pending):
+            logger.error("DCA: %d of %d daily trades failed to write", len(pending) - len(updates), len(pending))
+        await self.es.bulk_actions(updates, refresh=False)
+
+        return {"subscriptions_processed": len(subs), "trades_placed": len(updates), "skipped_closed": skipped_closed}
 
     async def get_subscriptions(self, market_id: str | None = None) -> list[dict]:
         """Get all DCA subscriptions, optionally filtered by market."""
@@ -274,15 +338,13 @@ class DCAService:
         trades = await self._get_dca_trades_by_id(dca_id)
 
         # Get current price
-        snap_result = await self.es.search(
+        snap = await self.es.latest_metrics(
             SNAPSHOTS_INDEX,
             query={"term": {"market_id": sub["market_id"]}},
-            sort=[{"timestamp_utc": {"order": "desc"}}],
-            size=1,
+            fields=SNAPSHOT_PRICE_FIELDS,
         )
         current_price = 0.0
-        if snap_result["hits"]["hits"]:
-            snap = snap_result["hits"]["hits"][0]["_source"]
+        if snap:
             current_price = snap["yes_price"] if sub["side"] == "YES" else snap["no_price"]
 
         market = await self.es.get(MARKETS_INDEX, sub["market_id"])
@@ -304,13 +366,11 @@ class DCAService:
         if market_id:
             must.append({"term": {"market_id": market_id}})
 
-        result = await self.es.search(
+        return await self.es.search_all(
             PAPER_TRADES_INDEX,
             query={"bool": {"must": must}},
-            sort=[{"created_at_utc": {"order": "asc"}}],
-            size=10000,
+            sort=[{"created_at_utc": {"order": "asc"}}, {"trade_id": {"order": "asc"}}],
         )
-        return [h["_source"] for h in result["hits"]["hits"]]
 
     async def get_portfolio_summary(self) -> dict:
         """Aggregate DCA analytics across all subscriptions."""
@@ -369,36 +429,39 @@ class DCAService:
         """Delete and regenerate trades for all active subscriptions."""
         await self.es.client.indices.refresh(index=SNAPSHOTS_INDEX)
 
-        result = await self.es.search(
+        subs = await self.es.search_all(
             DCA_INDEX,
             query={"term": {"active": True}},
-            size=10000,
+            sort=[{"dca_id": {"order": "asc"}}],
         )
-        subs = [h["_source"] for h in result["hits"]["hits"]]
 
         rebackfilled = 0
         errors = []
-        for sub in subs:
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+
+        async def rebackfill_one(sub: dict) -> None:
+            nonlocal rebackfilled
             dca_id = sub["dca_id"]
-            try:
-                await self._delete_dca_trades(dca_id)
-                await self._backfill(dca_id, sub["market_id"], sub["side"], sub["quantity"])
-                rebackfilled += 1
-            except Exception as e:
-                errors.append(f"{dca_id}: {e}")
-                logger.warning("rebackfill_all failed for %s: %s", dca_id, e)
+            async with semaphore:
+                try:
+                    await self._delete_dca_trades(dca_id)
+                    await self._backfill(dca_id, sub["market_id"], sub["side"], sub["quantity"])
+                    rebackfilled += 1
+                except Exception as e:
+                    errors.append(f"{dca_id}: {e}")
+                    logger.warning("rebackfill_all failed for %s: %s", dca_id, e)
+
+        await asyncio.gather(*(rebackfill_one(sub) for sub in subs))
 
         return {"subscriptions_rebackfilled": rebackfilled, "errors": errors}
 
     async def _get_dca_trades_by_id(self, dca_id: str) -> list[dict]:
         """Get all trades for a specific DCA subscription."""
-        result = await self.es.search(
+        return await self.es.search_all(
             PAPER_TRADES_INDEX,
             query={"bool": {"must": [
                 {"term": {"metadata.dca": True}},
                 {"term": {"metadata.dca_id": dca_id}},
             ]}},
-            sort=[{"created_at_utc": {"order": "asc"}}],
-            size=10000,
+            sort=[{"created_at_utc": {"order": "asc"}}, {"trade_id": {"order": "asc"}}],
         )
-        return [h["_source"] for h in result["hits"]["hits"]]
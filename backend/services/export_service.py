@@ -1,11 +1,10 @@
 """Export service — generate CSV/XLSX snapshots for audit trail."""
 
+import csv
 import logging
 import os
 from datetime import datetime, timezone
 
-import pandas as pd
-
 from core.es_client import ESClient
 
 logger = logging.getLogger(__name__)
@@ -13,6 +12,15 @@ logger = logging.getLogger(__name__)
 SNAPSHOTS_INDEX = "snapshots_wide"
 
 
+def write_rows_csv(filepath: str, rows: list[dict]) -> None:
+    """Write dict rows to CSV; columns are the union of keys in first-seen order."""
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    with open(filepath, "w", newline="", buffering=1 << 20) as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
 class ExportService:
     def __init__(self, es: ESClient, export_dir: str = "/exports"):
         self.es = es
@@ -44,9 +52,8 @@ class ExportService:
             logger.info("No snapshots to export for %s", date_str)
             return None
 
-        df = pd.DataFrame(rows)
         filepath = os.path.join(self.export_dir, f"snapshot_{date_str}.csv")
-        df.to_csv(filepath, index=False)
+        write_rows_csv(filepath, rows)
         logger.info("Exported %d rows to %s", len(rows), filepath)
         return filepath
 
@@ -66,8 +73,7 @@ class ExportService:
 
         now_str = datetime.now(timezone.utc).strftime("%Y_%m_%d_%H%M%S")
         filepath = os.path.join(self.export_dir, f"snapshot_all_{now_str}.csv")
-        df = pd.DataFrame(rows)
-        df.to_csv(filepath, index=False)
+        write_rows_csv(filepath, rows)
         logger.info("Exported %d rows to %s", len(rows), filepath)
         return filepath
 
@@ -1,15 +1,21 @@
 """Market service — query markets and snapshots from ES."""
 
+import heapq
 import logging
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
+
+from elasticsearch import BadRequestError
 
 from core.es_client import ESClient
+from utils.cache import ttl_cache
 
 logger = logging.getLogger(__name__)
 
 MARKETS_INDEX = "markets"
 SNAPSHOTS_INDEX = "snapshots_wide"
 TRACKED_INDEX = "tracked_markets"
+SNAPSHOT_PRICE_FIELDS = ["yes_price", "no_price", "timestamp_utc"]
+CATEGORIES_TTL_SECONDS = 300
 
 
 class MarketService:
@@ -30,15 +36,7 @@ class MarketService:
         must_clauses = []
 
         if tracked is not None:
-            # Get tracked market IDs
-            tracked_result = await self.es.search(
-                TRACKED_INDEX,
-                query={"term": {"is_tracked": True}},
-                size=10000,
-            )
-            tracked_ids = [
-                h["_source"]["market_id"] for h in tracked_result["hits"]["hits"]
-            ]
+            tracked_ids = await self._get_tracked_ids()
 
             if tracked:
                 if not tracked_ids:
@@ -136,15 +134,7 @@ class MarketService:
         from_: int = 0,
     ) -> dict:
         """Get discovered markets that are NOT tracked."""
-        # Get all tracked market IDs
-        tracked_result = await self.es.search(
-            TRACKED_INDEX,
-            query={"term": {"is_tracked": True}},
-            size=10000,
-        )
-        tracked_ids = [
-            h["_source"]["market_id"] for h in tracked_result["hits"]["hits"]
-        ]
+        tracked_ids = await self._get_tracked_ids()
 
         # Build query: not tracked + optional search + optional category
         must_clauses: list[dict] = []
@@ -189,10 +179,12 @@ class MarketService:
         total = result["hits"]["total"]["value"]
         return {"markets": markets, "total": total}
 
+    @ttl_cache(CATEGORIES_TTL_SECONDS)
     async def get_categories(self) -> list[str]:
-        """Get all unique source_tags (categories) across markets."""
+        """Get all unique source_tags (categories) across markets (cached for 5 minutes)."""
         result = await self.es.client.search(
             index=MARKETS_INDEX,
+            request_cache=True,
             body={
                 "size": 0,
                 "aggs": {
@@ -207,15 +199,7 @@ class MarketService:
 
     async def get_dashboard_summary(self) -> dict:
         """Get summary stats for the dashboard: biggest movers, closing soon, totals."""
-        # Get all tracked market IDs
-        tracked_result = await self.es.search(
-            TRACKED_INDEX,
-            query={"term": {"is_tracked": True}},
-            size=10000,
-        )
-        tracked_ids = [
-            h["_source"]["market_id"] for h in tracked_result["hits"]["hits"]
-        ]
+        tracked_ids = await self._get_tracked_ids()
 
         if not tracked_ids:
             return {
@@ -225,71 +209,98 @@ class MarketService:
                 "closing_soon": [],
             }
 
-        # Get tracked markets sorted by absolute price change
-        tracked_markets_result = await self.es.search(
+        # Biggest movers: top 5 by absolute one_day_price_change, sorted in ES
+        try:
+            movers_result = await self.es.client.search(
+                index=MARKETS_INDEX,
+                body={
+                    "query": {"terms": {"market_id": tracked_ids}},
+                    "runtime_mappings": {
+                        "abs_price_change": {
+                            "type": "double",
+                            "script": (
+                                "def c = doc['one_day_price_change'];"
+                                "emit(c.size() == 0 ? 0.0 : Math.abs(c.value));"
+                            ),
+                        }
+                    },
+                    "sort": [{"abs_price_change": {"order": "desc"}}],
+                    "size": 5,
+                },
+            )
+            movers = [h["_source"] for h in movers_result["hits"]["hits"]]
+            total_tracked = movers_result["hits"]["total"]["value"]
+        except BadRequestError as e:
+            # Fallback when scripting/runtime fields are unavailable (ES rejects the
+            # request with a 400): top-5 in Python. Transport errors and timeouts
+            # propagate rather than doubling the load with a bigger search.
+            logger.warning("Runtime-field movers sort failed, falling back: %s", e)
+            fallback_result = await self.es.search(
+                MARKETS_INDEX,
+                query={"terms": {"market_id": tracked_ids}},
+                size=len(tracked_ids),
+            )
+            tracked_markets = [h["_source"] for h in fallback_result["hits"]["hits"]]
+            movers = heapq.nlargest(
+                5, tracked_markets, key=lambda m: abs(m.get("one_day_price_change") or 0)
+            )
+            total_tracked = fallback_result["hits"]["total"]["value"]
+
+        # Closing soon: tracked markets with end_date in the next 30 days, sorted in ES
+        closing_result = await self.es.search(
             MARKETS_INDEX,
-            query={"terms": {"market_id": tracked_ids}},
-            sort=[{"one_day_price_change": {"order": "desc"}}],
-            size=1000,
+            query={"bool": {"filter": [
+                {"terms": {"market_id": tracked_ids}},
+                {"range": {"end_date": {"gt": "now", "lte": "now+30d"}}},
+            ]}},
+            sort=[{"end_date": {"order": "asc"}}],
+            size=5,
         )
-        tracked_markets = [h["_source"] for h in tracked_markets_result["hits"]["hits"]]
-
-        # Biggest movers: top 5 by absolute one_day_price_change
-        movers = sorted(
-            tracked_markets,
-            key=lambda m: abs(m.get("one_day_price_change", 0) or 0),
-            reverse=True,
-        )[:5]
-
-        # Closing soon: tracked markets with end_date in the next 30 days
         now = datetime.now(timezone.utc)
-        thirty_days = now + timedelta(days=30)
         closing_soon = []
-        for m in tracked_markets:
-            ed = m.get("end_date")
-            if not ed:
-                continue
+        for hit in closing_result["hits"]["hits"]:
+            m = hit["_source"]
             try:
-                if isinstance(ed, str):
-                    end_dt = datetime.fromisoformat(ed.replace("Z", "+00:00"))
-                else:
-                    end_dt = ed
-                if now < end_dt <= thirty_days:
-                    m["days_until_close"] = (end_dt - now).days
-                    closing_soon.append(m)
-            except (ValueError, TypeError):
+                end_dt = datetime.fromisoformat(str(m["end_date"]).replace("Z", "+00:00"))
+                m["days_until_close"] = max(0, (end_dt - now).days)
+            except (KeyError, ValueError, TypeError):
                 continue
-        closing_soon.sort(key=lambda m: m.get("days_until_close", 999))
-        closing_soon = closing_soon[:5]
+            closing_soon.append(m)
 
         # Total discovered
         total_discovered = await self.es.count(MARKETS_INDEX)
 
         return {
-            "total_tracked": tracked_markets_result["hits"]["total"]["value"],
+            "total_tracked": total_tracked,
             "total_discovered": total_discovered,
             "biggest_movers": movers,
             "closing_soon": closing_soon,
         }
 
+    async def _get_tracked_ids(self) -> list[str]:
+        """Get all tracked market IDs, paging past the 10k result window."""
+        docs = await self.es.search_all(
+            TRACKED_INDEX,
+            query={"term": {"is_tracked": True}},
+            sort=[{"market_id": {"order": "asc"}}],
+            source=["market_id"],
+        )
+        return [d["market_id"] for d in docs]
+
     async def _enrich_with_prices(self, markets: list[dict]):
         """Add latest yes_price/no_price from snapshots using a single batched query."""
         market_ids = [m.get("market_id") for m in markets if m.get("market_id")]
         if not market_ids:
             return
 
-        # One query: latest snapshot per market using collapse
-        result = await self.es.search(
+        # One aggregation: latest snapshot prices per market via top_metrics
+        snap_map = await self.es.latest_metrics_by(
             SNAPSHOTS_INDEX,
             query={"terms": {"market_id": market_ids}},
-            sort=[{"timestamp_utc": {"order": "desc"}}],
+            fields=SNAPSHOT_PRICE_FIELDS,
+            group_field="market_id",
             size=len(market_ids),
-            collapse="market_id",
         )
-        snap_map = {}
-        for hit in result["hits"]["hits"]:
-            s = hit["_source"]
-            snap_map[s["market_id"]] = s
 
         for m in markets:
             mid = m.get("market_id")
@@ -1,13 +1,18 @@
 """Paper trading service — open/close trades, compute positions and P&L."""
 
+import asyncio
 import logging
 import math
+import operator
 import random
-import uuid
-from collections import defaultdict
+import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict, deque
 from datetime import datetime, timezone
 
-from config import EXPERIMENT_END_DATE
+import numpy as np
+
+from config import EXPERIMENT_END_DATE, PAPER_TRADES_CACHE_TTL
 from core.es_client import ESClient
 from models.paper_trade import (
     OpenTradeRequest,
@@ -22,17 +27,216 @@ from models.paper_trade import (
     MonteCarloPercentageResult,
     MonteCarloResponse,
 )
+from utils.cache import ttl_cache
+from utils.ids import uuid7
 
 logger = logging.getLogger(__name__)
 
 PAPER_TRADES_INDEX = "paper_trades"
 SNAPSHOTS_INDEX = "snapshots_wide"
 MARKETS_INDEX = "markets"
+# Prices come from _source; market_id/timestamp_utc are read from hit["fields"]
+SNAPSHOT_PRICE_FIELDS = ["yes_price", "no_price"]
+# Daily-close aggregations are split so days × (markets + 1) buckets per sub-search
+# stays under this (ES's search.max_buckets default is 65,536), at most 50 markets each
+PRICE_AGG_MAX_BUCKETS = 50_000
+PRICE_AGG_MARKET_CHUNK = 50
+TRADES_PAGE_SIZE = 1000
+# Market docs are served from memory: `closed` can flip, so position views keep
+# them briefly; trade history only shows the question, which practically never changes.
+MARKET_META_TTL_SECONDS = 60
+MARKET_QUESTION_TTL_SECONDS = 30 * 60
+# Computed equity curves kept per service, keyed on the trades and prices behind them
+EQUITY_CURVE_CACHE_SIZE = 8
+# Per-(market_id, side) sub-aggregations summed server-side by _aggregate_positions
+POSITION_SOURCES = [
+    {"market_id": {"terms": {"field": "market_id"}}},
+    {"side": {"terms": {"field": "side"}}},
+]
+# Trades indexed before notional/signed_notional existed
+MISSING_NOTIONAL_QUERY = {"bool": {"must_not": {"exists": {"field": "notional"}}}}
+# Fills notional/signed_notional on those trades
+NOTIONAL_BACKFILL_SCRIPT = {
+    "lang": "painless",
+    "source": (
+        "double n = ctx._source.quantity * ctx._source.price;"
+        "ctx._source.notional = n;"
+        "ctx._source.signed_notional = ctx._source.action == 'CLOSE' ? -n : n;"
+    ),
+}
+POSITION_AGGS = {
+    "open": {
+        "filter": {"term": {"action": "OPEN"}},
+        "aggs": {
+            "quantity": {"sum": {"field": "quantity"}},
+            "notional": {"sum": {"field": "notional"}},
+        },
+    },
+    "close": {
+        "filter": {"term": {"action": "CLOSE"}},
+        "aggs": {
+            "quantity": {"sum": {"field": "quantity"}},
+            "notional": {"sum": {"field": "notional"}},
+        },
+    },
+    "last_trade": {"max": {"field": "created_at_utc", "format": "yyyy-MM-dd"}},
+}
+
+
+def fifo_close(lots: deque, quantity: float, price: float) -> float:
+    """Match a CLOSE of quantity@price against open lots oldest-first.
+
+    Mutates `lots` (a deque of (qty, price)) in place and returns the realized P&L.
+    """
+    remaining = quantity
+    realized = 0.0
+    while remaining > 0 and lots:
+        open_qty, open_price = lots.popleft()
+        matched = min(remaining, open_qty)
+        realized += matched * (price - open_price)
+        remaining -= matched
+        if matched < open_qty:
+            lots.appendleft((open_qty - matched, open_price))
+    return realized
+
+
+def replay_fifo(trades: list[dict]) -> tuple[list[float], dict[tuple[str, str], deque]]:
+    """Replay OPEN/CLOSE trades in order.
+
+    Returns (realized P&L of each CLOSE, remaining open lots per (market_id, side)).
+    """
+    open_lots: dict[tuple[str, str], deque] = defaultdict(deque)
+    close_pnls: list[float] = []
+    for t in trades:
+        key = (t["market_id"], t["side"])
+        if t["action"] == "OPEN":
+            open_lots[key].append((float(t["quantity"]), float(t["price"])))
+        elif t["action"] == "CLOSE":
+            close_pnls.append(fifo_close(open_lots[key], float(t["quantity"]), float(t["price"])))
+    return close_pnls, open_lots
+
+
+def fifo_arrays(trades: list[dict]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Columnar (codes, is_open, qty, price) for fifo_trade_pnls.
+
+    Trades are integer-coded by (market_id, side) and stable-sorted by code, so each
+    position is one contiguous run that keeps its input (chronological) order.
+    """
+    n = len(trades)
+    codes_of: dict[tuple[str, str], int] = {}
+    codes = np.fromiter(
+        (codes_of.setdefault((t["market_id"], t["side"]), len(codes_of)) for t in trades),
+        dtype=np.int64, count=n,
+    )
+    is_open = np.fromiter((t["action"] == "OPEN" for t in trades), dtype=bool, count=n)
+    qty = np.fromiter((t["quantity"] for t in trades), dtype=np.float64, count=n)
+    price = np.fromiter((t["price"] for t in trades), dtype=np.float64, count=n)
+    order = np.argsort(codes, kind="stable")
+    return codes[order], is_open[order], qty[order], price[order]
+
+
+def fifo_trade_pnls(
+    codes: np.ndarray, is_open: np.ndarray, qty: np.ndarray, price: np.ndarray
+) -> np.ndarray:
+    """FIFO realized P&L of every trade (0 for OPENs), for trades grouped by position code.
+
+    A CLOSE matches the oldest open units still unmatched, so after k trades a position
+    has matched its first M_k opened units, where M_k = min(M_{k-1} + close_qty, opened_k).
+    That recursion unrolls to closed_k + running_min(min(opened - closed, 0)), and the
+    cost of the first M units is read off the cumulative (opened, cost) curve with
+    np.interp. The running min only needs a per-position pass where a CLOSE exceeded
+    the open lots.
+    """
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0)
+    new_group = np.r_[True, codes[1:] != codes[:-1]]
+    starts = np.flatnonzero(new_group)
+    group = np.cumsum(new_group) - 1
+
+    open_qty = np.where(is_open, qty, 0.0)
+    close_qty = qty - open_qty
+    open_cost = open_qty * price
+    opened = np.cumsum(open_qty)
+    closed = np.cumsum(close_qty)
+    cost = np.cumsum(open_cost)
+    opened_before = (opened - open_qty)[starts]
+    closed_before = (closed - close_qty)[starts]
+    cost_before = (cost - open_cost)[starts]
+
+    closed_g = closed - closed_before[group]
+    headroom = np.minimum(opened - opened_before[group] - closed_g, 0.0)
+    shortfall = np.zeros(n)
+    for g in np.unique(group[headroom < 0]):
+        run = slice(starts[g], starts[g + 1] if g + 1 < len(starts) else n)
+        shortfall[run] = np.minimum.accumulate(headroom[run])
+    matched_cum = closed_g + shortfall
+    matched_cost_cum = np.interp(
+        opened_before[group] + matched_cum, np.r_[0.0, opened[is_open]], np.r_[0.0, cost[is_open]]
+    ) - cost_before[group]
+
+    matched = np.diff(matched_cum, prepend=0.0)
+    matched_cost = np.diff(matched_cost_cum, prepend=0.0)
+    matched[starts] = matched_cum[starts]
+    matched_cost[starts] = matched_cost_cum[starts]
+    return matched * price - matched_cost
+
+
+def mark_to_market(
+    open_qty: np.ndarray,
+    open_cost: np.ndarray,
+    pos_mkt: np.ndarray,
+    pos_yes: np.ndarray,
+    yes_px: np.ndarray,
+    no_px: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return (unrealized P&L, market value) of held positions at the latest known prices.
+
+    Position arrays are parallel (quantity, cost, market index, is-YES); price arrays
+    are indexed by market and NaN until a market's first snapshot, in which case the
+    position is valued at its average entry price (i.e. at cost). Leading axes are
+    kept, so (dates x positions) state with (dates x markets) prices values every
+    date at once.
+    """
+    held = open_qty > 0
+    cp = np.where(pos_yes, yes_px[..., pos_mkt], no_px[..., pos_mkt])
+    cost = np.where(held, open_cost, 0.0)
+    value = np.where(held, np.where(np.isnan(cp), open_cost, open_qty * cp), 0.0)
+    portfolio_value = value.sum(axis=-1)
+    return portfolio_value - cost.sum(axis=-1), portfolio_value
+
+
+def linear_trend(y: np.ndarray) -> tuple[float, float, float]:
+    """Least-squares fit of y against 0..n-1; returns (slope, r², two-sided p-value).
+
+    Closed-form equivalent of scipy.stats.linregress for n >= 3, using only the
+    Student-t CDF from scipy.special instead of importing scipy.stats.
+    """
+    from scipy.special import stdtr
+
+    n = len(y)
+    xd = np.arange(n, dtype=np.float64) - (n - 1) / 2.0
+    yd = y - y.mean()
+    sxx = float(xd @ xd)
+    syy = float(yd @ yd)
+    sxy = float(xd @ yd)
+    slope = sxy / sxx
+    if syy == 0:
+        return slope, 0.0, 1.0
+    r_squared = sxy * sxy / (sxx * syy)
+    ss_res = syy - slope * sxy
+    if ss_res <= 0:
+        return slope, r_squared, 0.0
+    t = slope * math.sqrt((n - 2) * sxx / ss_res)
+    return slope, r_squared, float(2.0 * stdtr(n - 2, -abs(t)))
 
 
 class PaperTradingService:
     def __init__(self, es: ESClient):
         self.es = es
+        self._market_cache: dict[str, tuple[float, dict]] = {}  # market_id -> (fetched_at, doc)
+        # (equity data key, flip_sides) -> response, least recently used first
+        self._curve_cache: OrderedDict[tuple, EquityCurveResponse] = OrderedDict()
 
     async def open_trade(self, req: OpenTradeRequest) -> PaperTrade:
         """Open a paper trade: record a BUY at the nearest snapshot price."""
@@ -40,26 +244,50 @@ class PaperTradingService:
         if not snapshot:
             raise ValueError(f"No snapshot found for market {req.market_id}")
 
-        price = snapshot["yes_price"] if req.side.upper() == "YES" else snapshot["no_price"]
+        trade = self._build_trade("OPEN", req.market_id, req.side, req.quantity, snapshot, req.fees)
+        await self.es.create_doc(PAPER_TRADES_INDEX, self._trade_doc(trade), refresh="wait_for")
+        self._invalidate_trade_caches()
+        logger.info("Opened trade %s: %s %s @ %.4f", trade.trade_id, req.side, req.market_id, trade.price)
+        return trade
 
-        trade = PaperTrade(
-            trade_id=str(uuid.uuid4()),
-            created_at_utc=datetime.now(timezone.utc),
-            market_id=req.market_id,
-            side=req.side.upper(),
-            action="OPEN",
-            quantity=req.quantity,
-            price=price,
-            snapshot_ts_utc=snapshot.get("timestamp_utc"),
-            fees=req.fees,
-            metadata={},
+    async def bulk_open_trades(self, reqs: list[OpenTradeRequest]) -> list[PaperTrade]:
+        """Open many paper trades: one _msearch for their snapshots, one _bulk write.
+
+        Fails before writing anything if any market has no snapshot. Returns only
+        the trades ES confirmed, so a partial failure can be retried for the rest
+        without duplicating the ones that landed.
+        """
+        if not reqs:
+            return []
+        snap_by_pair = await self._nearest_snapshots_batch(
+            [(req.market_id, req.at_timestamp) for req in reqs]
         )
+        snapshots = [snap_by_pair[(req.market_id, req.at_timestamp)] for req in reqs]
+        missing = sorted({req.market_id for req, snap in zip(reqs, snapshots) if not snap})
+        if missing:
+            raise ValueError(f"No snapshot found for markets {', '.join(missing)}")
+
+        trades = [
+            self._build_trade("OPEN", req.market_id, req.side, req.quantity, snap, req.fees)
+            for req, snap in zip(reqs, snapshots)
+        ]
+        return await self._bulk_write_trades(trades, "opened")
 
-        await self.es.index_doc(
-            PAPER_TRADES_INDEX, trade.trade_id, trade.model_dump(mode="json")
+    async def _bulk_write_trades(self, trades: list[PaperTrade], verb: str) -> list[PaperTrade]:
+        """Bulk-index trades and return the ones written; raises if none were."""
+        result = await self.es.bulk_index(
+            PAPER_TRADES_INDEX, [self._trade_doc(t) for t in trades], refresh="wait_for"
         )
-        logger.info("Opened trade %s: %s %s @ %.4f", trade.trade_id, req.side, req.market_id, price)
-        return trade
+        written = [t for t, ok in zip(trades, result["ok"]) if ok]
+        if written:
+            self._invalidate_trade_caches()
+        if result["errors"]:
+            logger.warning("Bulk %s %d of %d trades (%d errors)", verb, len(written), len(trades), result["errors"])
+            if not written:
+                raise RuntimeError(f"Bulk write failed for all {len(trades)} trades")
+        else:
+            logger.info("Bulk %s %d trades", verb, len(written))
+        return written
 
     async def close_trade(self, req: CloseTradeRequest) -> PaperTrade:
         """Close (sell) a paper position by recording a CLOSE trade."""
@@ -67,94 +295,172 @@ class PaperTradingService:
         if not snapshot:
             raise ValueError(f"No snapshot found for market {req.market_id}")
 
-        price = snapshot["yes_price"] if req.side.upper() == "YES" else snapshot["no_price"]
-
         # Determine quantity: if not specified, close the full open position
         quantity = req.quantity
         if quantity is None:
-            positions = await self._aggregate_positions()
+            positions = await self._aggregate_positions(req.market_id, req.side.upper())
             key = (req.market_id, req.side.upper())
             pos = positions.get(key)
             if not pos or pos["net_quantity"] <= 0:
                 raise ValueError(f"No open position for {req.market_id} {req.side}")
             quantity = pos["net_quantity"]
 
-        trade = PaperTrade(
-            trade_id=str(uuid.uuid4()),
-            created_at_utc=datetime.now(timezone.utc),
-            market_id=req.market_id,
-            side=req.side.upper(),
-            action="CLOSE",
-            quantity=quantity,
-            price=price,
-            snapshot_ts_utc=snapshot.get("timestamp_utc"),
-            fees=req.fees,
-            metadata={},
-        )
-
-        await self.es.index_doc(
-            PAPER_TRADES_INDEX, trade.trade_id, trade.model_dump(mode="json")
-        )
-        logger.info("Closed trade %s: %s %s @ %.4f", trade.trade_id, req.side, req.market_id, price)
+        trade = self._build_trade("CLOSE", req.market_id, req.side, quantity, snapshot, req.fees)
+        await self.es.create_doc(PAPER_TRADES_INDEX, self._trade_doc(trade), refresh="wait_for")
+        self._invalidate_trade_caches()
+        logger.info("Closed trade %s: %s %s @ %.4f", trade.trade_id, req.side, req.market_id, trade.price)
         return trade
 
-    async def get_open_positions(self) -> list[Position]:
-        """Compute open positions as of EXPERIMENT_END_DATE with prices as of that date."""
-        # Cap trades at experiment end so positions reflect the closed experiment
-        all_trades = await self._get_all_trades()
-        trades_capped = [t for t in all_trades if t["created_at_utc"][:10] <= EXPERIMENT_END_DATE]
+    async def bulk_close_trades(self, reqs: list[CloseTradeRequest]) -> list[PaperTrade]:
+        """Close many paper positions: one _msearch for snapshots, one position
+        aggregation for close-all requests, one _bulk write.
 
-        positions_raw: dict[tuple[str, str], dict] = defaultdict(
-            lambda: {"open_quantity": 0.0, "open_cost": 0.0, "close_quantity": 0.0, "last_trade_date": ""}
-        )
-        for t in trades_capped:
+        Fails before writing anything if a market has no snapshot or a close-all
+        request has no open position left to close. Like bulk_open_trades, returns
+        only the trades ES confirmed.
+        """
+        if not reqs:
+            return []
+        pairs = [(req.market_id, req.at_timestamp) for req in reqs]
+        if any(req.quantity is None for req in reqs):
+            snap_by_pair, positions = await asyncio.gather(
+                self._nearest_snapshots_batch(pairs), self._aggregate_positions()
+            )
+        else:
+            snap_by_pair = await self._nearest_snapshots_batch(pairs)
+            positions = {}
+        snapshots = [snap_by_pair[pair] for pair in pairs]
+        missing = sorted({req.market_id for req, snap in zip(reqs, snapshots) if not snap})
+        if missing:
+            raise ValueError(f"No snapshot found for markets {', '.join(missing)}")
+
+        # Close-all quantities come off what earlier requests in the batch already closed
+        remaining = {key: pos["net_quantity"] for key, pos in positions.items()}
+        trades = []
+        for req, snap in zip(reqs, snapshots):
+            key = (req.market_id, req.side.upper())
+            quantity = req.quantity
+            if quantity is None:
+                quantity = remaining.get(key, 0.0)
+                if quantity <= 0:
+                    raise ValueError(f"No open position for {req.market_id} {req.side}")
+            if key in remaining:
+                remaining[key] -= quantity
+            trades.append(
+                self._build_trade("CLOSE", req.market_id, req.side, quantity, snap, req.fees)
+            )
+
+        return await self._bulk_write_trades(trades, "closed")
+
+    @staticmethod
+    def _net_positions(trades: list[dict], end_date: str) -> dict[tuple[str, str], dict]:
+        """Net open positions per (market_id, side) from trades dated on or before end_date.
+
+        One pass with a single dict lookup per trade into [open_qty, open_cost,
+        close_qty, last_created_at] accumulators; only keys with net quantity > 0 are
+        kept. Whole created_at_utc strings are compared against a cutoff instead of
+        slicing out the date per trade: anything on end_date sorts below
+        end_date + "\x7f", since the character after the date is "T".
+        """
+        cutoff = end_date + "\x7f"
+        acc: dict[tuple[str, str], list] = {}
+        for t in trades:
+            created = t["created_at_utc"]
+            if created > cutoff:
+                continue
             key = (t["market_id"], t["side"])
+            pos = acc.get(key)
+            if pos is None:
+                pos = acc[key] = [0.0, 0.0, 0.0, ""]
             qty = float(t["quantity"])
-            price = float(t["price"])
-            if t["action"] == "OPEN":
-                positions_raw[key]["open_quantity"] += qty
-                positions_raw[key]["open_cost"] += qty * price
-            elif t["action"] == "CLOSE":
-                positions_raw[key]["close_quantity"] += qty
-            trade_date = t.get("created_at_utc", "")[:10]
-            if trade_date > positions_raw[key]["last_trade_date"]:
-                positions_raw[key]["last_trade_date"] = trade_date
+            action = t["action"]
+            if action == "OPEN":
+                pos[0] += qty
+                pos[1] += qty * float(t["price"])
+            elif action == "CLOSE":
+                pos[2] += qty
+            if created > pos[3]:
+                pos[3] = created
 
         open_positions = {}
-        for key, pos in positions_raw.items():
-            net_qty = pos["open_quantity"] - pos["close_quantity"]
+        for key, (open_qty, open_cost, close_qty, last_created) in acc.items():
+            net_qty = open_qty - close_qty
             if net_qty > 0:
-                avg_entry = pos["open_cost"] / pos["open_quantity"] if pos["open_quantity"] > 0 else 0.0
                 open_positions[key] = {
                     "net_quantity": net_qty,
-                    "avg_entry_price": avg_entry,
-                    "last_trade_date": pos["last_trade_date"],
+                    "avg_entry_price": open_cost / open_qty if open_qty > 0 else 0.0,
+                    "last_trade_date": last_created[:10],
                 }
+        return open_positions
+
+    @staticmethod
+    def _build_trade(
+        action: str, market_id: str, side: str, quantity: float, snapshot: dict, fees: float
+    ) -> PaperTrade:
+        """Build a trade priced at the snapshot's price for the given side."""
+        side = side.upper()
+        return PaperTrade(
+            trade_id=uuid7(),
+            created_at_utc=datetime.now(timezone.utc),
+            market_id=market_id,
+            side=side,
+            action=action,
+            quantity=quantity,
+            price=snapshot["yes_price"] if side == "YES" else snapshot["no_price"],
+            snapshot_ts_utc=snapshot.get("timestamp_utc"),
+            fees=fees,
+            metadata={},
+        )
+
+    async def get_open_positions(self, all_trades: list[dict] | None = None) -> list[Position]:
+        """Compute open positions as of EXPERIMENT_END_DATE with prices as of that date.
+
+        Without `all_trades`, positions are summed server-side by a composite
+        aggregation; pass an already-fetched trade list to net it in Python instead.
+        """
+        # Cap trades at experiment end so positions reflect the closed experiment
+        if all_trades is None:
+            # Net positions come back pre-aggregated; no trade docs leave ES
+            positions = await self._aggregate_positions(end_date=EXPERIMENT_END_DATE)
+            open_positions = {k: p for k, p in positions.items() if p["net_quantity"] > 0}
+        else:
+            open_positions = self._net_positions(all_trades, EXPERIMENT_END_DATE)
 
         if not open_positions:
             return []
 
-        # Batch fetch: all unique market_ids
-        market_ids = list(set(mid for mid, _ in open_positions.keys()))
+        market_ids = list({mid for mid, _ in open_positions})
+        experiment_end = EXPERIMENT_END_DATE + "T23:59:59Z"
 
-        # Latest snapshot per market on or before experiment end date
-        snap_result = await self.es.search(
-            SNAPSHOTS_INDEX,
-            query={"bool": {"must": [
-                {"terms": {"market_id": market_ids}},
-                {"range": {"timestamp_utc": {"lte": EXPERIMENT_END_DATE + "T23:59:59Z"}}},
-            ]}},
-            sort=[{"timestamp_utc": {"order": "desc"}}],
-            size=len(market_ids),
-            collapse="market_id",
-        )
-        snap_map = {}
-        for hit in snap_result["hits"]["hits"]:
-            s = hit["_source"]
-            snap_map[s["market_id"]] = s
-
-        # One mget: all market metadata
-        market_map = await self.es.mget(MARKETS_INDEX, market_ids)
+        if len(market_ids) == 1:
+            # Single market: a plain newest-hit lookup, no collapse needed
+            snapshot, market_map = await asyncio.gather(
+                self._nearest_snapshot(market_ids[0], datetime.fromisoformat(experiment_end)),
+                self._market_meta(market_ids),
+            )
+            snap_map = {market_ids[0]: snapshot} if snapshot else {}
+        else:
+            # Latest snapshot per market on or before experiment end date, fetched
+            # concurrently with market metadata (one mget for ids not already cached)
+            snap_result, market_map = await asyncio.gather(
+                self.es.search(
+                    SNAPSHOTS_INDEX,
+                    query={"bool": {"must": [
+                        {"terms": {"market_id": market_ids}},
+                        {"range": {"timestamp_utc": {"lte": experiment_end}}},
+                    ]}},
+                    sort=[{"timestamp_utc": {"order": "desc"}}],
+                    size=len(market_ids),
+                    collapse="market_id",
+                    source=SNAPSHOT_PRICE_FIELDS,
+                ),
+                self._market_meta(market_ids),
+            )
+            # The collapse key is echoed in hit["fields"], so market_id needs no _source
+            snap_map = {
+                hit["fields"]["market_id"][0]: hit["_source"]
+                for hit in snap_result["hits"]["hits"]
+            }
 
         result = []
         for (market_id, side), pos in open_positions.items():
@@ -192,10 +498,11 @@ class PaperTradingService:
 
     async def get_portfolio_summary(self) -> PortfolioSummary:
         """Compute portfolio summary as of EXPERIMENT_END_DATE."""
+        # Fetch trades once and share them with the equity curve computation
         all_trades = await self._get_all_trades()
 
         # Derive P&L from the capped equity curve so numbers are consistent with charts
-        curve_resp = await self.get_equity_curve()
+        curve_resp = await self.get_equity_curve(all_trades=all_trades)
         if curve_resp.curve:
             last = curve_resp.curve[-1]
             total_equity = last.portfolio_value
@@ -205,13 +512,20 @@ class PaperTradingService:
         else:
             total_equity = total_unrealized = total_cost = realized_pnl = 0.0
 
-        # Count subscriptions that were open at experiment end
-        trades_capped = [t for t in all_trades if t["created_at_utc"][:10] <= EXPERIMENT_END_DATE]
-        open_markets = len(set(
-            t["market_id"] for t in trades_capped if t["action"] == "OPEN"
-        ) - set(
-            t["market_id"] for t in trades_capped if t["action"] == "CLOSE"
-        ))
+        # Count subscriptions that were open at experiment end, in one pass over trades
+        total_trades = 0
+        opened: set[str] = set()
+        closed: set[str] = set()
+        for t in all_trades:
+            if t["created_at_utc"][:10] > EXPERIMENT_END_DATE:
+                continue
+            total_trades += 1
+            action = t["action"]
+            if action == "OPEN":
+                opened.add(t["market_id"])
+            elif action == "CLOSE":
+                closed.add(t["market_id"])
+        open_markets = len(opened - closed)
 
         return PortfolioSummary(
             total_equity=round(total_equity, 4),
@@ -219,7 +533,7 @@ class PaperTradingService:
             total_unrealized_pnl=round(total_unrealized, 4),
             total_realized_pnl=round(realized_pnl, 4),
             open_position_count=open_markets,
-            total_trades=len(trades_capped),
+            total_trades=total_trades,
         )
 
     async def generate_gain_chart(self) -> bytes:
@@ -336,21 +650,20 @@ class PaperTradingService:
 
     async def get_all_trades(self) -> list[dict]:
         """Get all paper trades up to EXPERIMENT_END_DATE, newest first, enriched with market questions."""
-        result = await self.es.search(
-            PAPER_TRADES_INDEX,
-            query={"range": {"created_at_utc": {"lte": EXPERIMENT_END_DATE + "T23:59:59Z"}}},
-            sort=[{"created_at_utc": {"order": "desc"}}],
-            size=10000,
+        query = {"range": {"created_at_utc": {"lte": EXPERIMENT_END_DATE + "T23:59:59Z"}}}
+        # Page the trades and resolve their markets' questions concurrently
+        trades, market_map = await asyncio.gather(
+            self.es.search_all(
+                PAPER_TRADES_INDEX,
+                query=query,
+                sort=[{"created_at_utc": {"order": "desc"}}, {"trade_id": {"order": "desc"}}],
+                page_size=TRADES_PAGE_SIZE,
+            ),
+            self._traded_market_meta(query),
         )
-        trades = [hit["_source"] for hit in result["hits"]["hits"]]
-
-        # Batch fetch market questions
-        market_ids = list(set(t["market_id"] for t in trades if t.get("market_id")))
-        if market_ids:
-            market_map = await self.es.mget(MARKETS_INDEX, market_ids)
-            for t in trades:
-                m = market_map.get(t["market_id"])
-                t["question"] = m.get("question", "") if m else ""
+        for t in trades:
+            m = market_map.get(t.get("market_id"))
+            t["question"] = m.get("question", "") if m else ""
 
         return trades
 
@@ -359,8 +672,7 @@ class PaperTradingService:
         import io
         import pandas as pd
 
-        positions = await self.get_open_positions()
-        trades = await self.get_all_trades()
+        positions, trades = await asyncio.gather(self.get_open_positions(), self.get_all_trades())
 
         pos_rows = [
             {
@@ -400,187 +712,467 @@ class PaperTradingService:
             pd.DataFrame(trade_rows).to_excel(writer, sheet_name="Trade History", index=False)
         return buf.getvalue()
 
+    @staticmethod
+    def _trade_doc(trade: PaperTrade) -> dict:
+        """Serialize a trade with its precomputed notional for server-side sums.
+
+        A shallow dict(trade) skips pydantic's serializer; the fields are already
+        validated scalars and the ES client's serializer encodes the datetimes.
+        """
+        doc = dict(trade)
+        doc["notional"] = trade.quantity * trade.price
+        doc["signed_notional"] = -doc["notional"] if trade.action == "CLOSE" else doc["notional"]
+        return doc
+
+    async def count_missing_notional(self) -> int:
+        """Trades without notional fields, which _aggregate_positions undercounts."""
+        return await self.es.count(PAPER_TRADES_INDEX, MISSING_NOTIONAL_QUERY)
+
+    async def backfill_notional(self) -> dict:
+        """Populate notional fields on trades that predate them (one-off job).
+
+        Returns {"updated", "remaining"}; remaining > 0 means some trades still
+        lack notional and position aggregates are still short by them.
+        """
+        updated = await self.es.update_by_query(
+            PAPER_TRADES_INDEX, MISSING_NOTIONAL_QUERY, NOTIONAL_BACKFILL_SCRIPT
+        )
+        if updated:
+            self._invalidate_trade_caches()
+        remaining = await self.count_missing_notional()
+        if remaining:
+            logger.warning("Notional backfill updated %d trades; %d still lack notional", updated, remaining)
+        else:
+            logger.info("Notional backfill updated %d trades; none left without notional", updated)
+        return {"updated": updated, "remaining": remaining}
+
+    async def _market_meta(
+        self, market_ids: list[str], max_age: float = MARKET_META_TTL_SECONDS
+    ) -> dict[str, dict]:
+        """mget market docs, serving entries fetched within max_age seconds from cache."""
+        now = time.monotonic()
+        found: dict[str, dict] = {}
+        stale: list[str] = []
+        for mid in market_ids:
+            entry = self._market_cache.get(mid)
+            if entry and now - entry[0] < max_age:
+                found[mid] = entry[1]
+            else:
+                stale.append(mid)
+        if stale:
+            fetched = await self.es.mget(MARKETS_INDEX, stale)
+            for mid, doc in fetched.items():
+                self._market_cache[mid] = (now, doc)
+            found.update(fetched)
+        return found
+
+    async def _traded_market_meta(self, query: dict) -> dict[str, dict]:
+        """Market docs for every market_id among trades matching query (terms via composite agg)."""
+        buckets = await self.es.composite_buckets(
+            PAPER_TRADES_INDEX, query, [{"market_id": {"terms": {"field": "market_id"}}}]
+        )
+        market_ids = [b["key"]["market_id"] for b in buckets]
+        if not market_ids:
+            return {}
+        return await self._market_meta(market_ids, max_age=MARKET_QUESTION_TTL_SECONDS)
+
     async def _nearest_snapshot(
         self, market_id: str, timestamp: datetime | None = None
     ) -> dict | None:
         """Find the nearest snapshot at or before the given timestamp (or latest)."""
-        must_clauses = [{"term": {"market_id": market_id}}]
-        if timestamp:
-            must_clauses.append(
-                {"range": {"timestamp_utc": {"lte": timestamp.isoformat()}}}
-            )
-
+        body = self._nearest_snapshot_body(market_id, timestamp)
         result = await self.es.search(
             SNAPSHOTS_INDEX,
-            query={"bool": {"must": must_clauses}},
-            sort=[{"timestamp_utc": {"order": "desc"}}],
+            query=body["query"],
+            sort=body["sort"],
             size=1,
+            source=SNAPSHOT_PRICE_FIELDS,
+            docvalue_fields=["timestamp_utc"],
+            track_total_hits=False,
+            pre_filter_shard_size=1 if timestamp else None,
         )
+        return self._snapshot_from_hits(result["hits"]["hits"])
 
-        hits = result["hits"]["hits"]
-        return hits[0]["_source"] if hits else None
+    async def _nearest_snapshots_batch(
+        self, pairs: list[tuple[str, datetime | None]]
+    ) -> dict[tuple[str, datetime | None], dict | None]:
+        """_nearest_snapshot for many (market_id, timestamp) pairs in one _msearch.
 
-    async def _get_all_trades(self) -> list[dict]:
-        """Get all trades from ES using search_after pagination to bypass the 10k limit."""
-        all_trades = []
-        page_size = 5000
-        search_after = None
-
-        while True:
-            body: dict = {
-                "query": {"match_all": {}},
-                "sort": [{"created_at_utc": {"order": "asc"}}, {"trade_id": {"order": "asc"}}],
-                "size": page_size,
-            }
-            if search_after:
-                body["search_after"] = search_after
-
-            result = await self.es.client.search(index=PAPER_TRADES_INDEX, body=body)
-            hits = result["hits"]["hits"]
-            if not hits:
-                break
-            all_trades.extend(hit["_source"] for hit in hits)
-            if len(hits) < page_size:
-                break
-            search_after = hits[-1]["sort"]
-
-        return all_trades
-
-    async def _aggregate_positions(self) -> dict[tuple[str, str], dict]:
-        """Aggregate trades into net positions per (market_id, side)."""
-        trades = await self._get_all_trades()
-        positions: dict[tuple[str, str], dict] = defaultdict(
-            lambda: {"open_quantity": 0.0, "open_cost": 0.0, "close_quantity": 0.0, "close_revenue": 0.0, "last_trade_date": ""}
+        Duplicate pairs are looked up once; every pair maps to its snapshot or None.
+        """
+        unique = list(dict.fromkeys(pairs))
+        if not unique:
+            return {}
+        results = await self.es.msearch(
+            SNAPSHOTS_INDEX, [self._nearest_snapshot_body(mid, ts) for mid, ts in unique]
         )
+        return {
+            pair: self._snapshot_from_hits(r["hits"]["hits"])
+            for pair, r in zip(unique, results)
+        }
 
-        for t in trades:
-            key = (t["market_id"], t["side"])
-            qty = float(t["quantity"])
-            price = float(t["price"])
+    @staticmethod
+    def _nearest_snapshot_body(market_id: str, timestamp: datetime | None) -> dict:
+        """Search body for the newest snapshot of market_id at or before timestamp.
 
-            if t["action"] == "OPEN":
-                positions[key]["open_quantity"] += qty
-                positions[key]["open_cost"] += qty * price
-            elif t["action"] == "CLOSE":
-                positions[key]["close_quantity"] += qty
-                positions[key]["close_revenue"] += qty * price
+        The lookup is a seek, not a scan: filter-context clauses (no scoring, cacheable)
+        plus a timestamp sort desc with size 1 let ES stop at the first hit per shard.
+        """
+        filters = [{"term": {"market_id": market_id}}]
+        if timestamp:
+            filters.append(
+                {"range": {"timestamp_utc": {"lte": timestamp.isoformat()}}}
+            )
+        return {
+            "size": 1,
+            "query": {"bool": {"filter": filters}},
+            "sort": [{"timestamp_utc": {"order": "desc"}}],
+            "_source": SNAPSHOT_PRICE_FIELDS,
+            "docvalue_fields": ["timestamp_utc"],
+            "track_total_hits": False,
+        }
+
+    @staticmethod
+    def _snapshot_from_hits(hits: list[dict]) -> dict | None:
+        """Prices from the first hit's _source plus its doc-value timestamp, or None."""
+        if not hits:
+            return None
+        snapshot = hits[0]["_source"]
+        snapshot["timestamp_utc"] = hits[0]["fields"]["timestamp_utc"][0]
+        return snapshot
+
+    def _invalidate_trade_caches(self) -> None:
+        """Drop cached trades/positions/curves after this service writes a trade.
+
+        Writers call this after a refresh="wait_for" write, so the next read that
+        repopulates the cache already sees the trade. Trades written elsewhere (DCA
+        daily runs and rebackfills, CLOB backfills) don't invalidate: they show up
+        once the cached entries expire, within PAPER_TRADES_CACHE_TTL seconds plus
+        the index refresh interval.
+        """
+        PaperTradingService._get_all_trades.invalidate(self)
+        PaperTradingService._aggregate_positions.invalidate(self)
+        self._curve_cache.clear()
+
+    @ttl_cache(PAPER_TRADES_CACHE_TTL)
+    async def _get_all_trades(self) -> list[dict]:
+        """Get all trades from ES using search_after pagination to bypass the 10k limit.
 
-            # Track latest trade date
-            trade_date = t.get("created_at_utc", "")[:10]
-            if trade_date > positions[key]["last_trade_date"]:
-                positions[key]["last_trade_date"] = trade_date
+        Cached for PAPER_TRADES_CACHE_TTL seconds so back-to-back portfolio calls share
+        one scan; callers must treat the list and its dicts as read-only.
+        """
+        return await self.es.search_all(
+            PAPER_TRADES_INDEX,
+            query={"match_all": {}},
+            sort=[{"created_at_utc": {"order": "asc"}}, {"trade_id": {"order": "asc"}}],
+            page_size=TRADES_PAGE_SIZE,
+        )
 
-        # Compute net quantities and avg entry prices
+    @ttl_cache(PAPER_TRADES_CACHE_TTL)
+    async def _aggregate_positions(
+        self,
+        market_id: str | None = None,
+        side: str | None = None,
+        end_date: str | None = None,
+    ) -> dict[tuple[str, str], dict]:
+        """Aggregate trades into net positions per (market_id, side) inside ES.
+
+        Pass market_id/side to narrow the aggregation to a single position, and
+        end_date (YYYY-MM-DD) to only count trades made on or before that day.
+        """
+        filters: list[dict] = []
+        if end_date:
+            filters.append({"range": {"created_at_utc": {"lte": f"{end_date}T23:59:59Z"}}})
+        if market_id:
+            filters.append({"term": {"market_id": market_id}})
+        if side:
+            filters.append({"term": {"side": side}})
+        query = {"bool": {"filter": filters}} if filters else {"match_all": {}}
+        buckets = await self.es.composite_buckets(
+            PAPER_TRADES_INDEX, query, POSITION_SOURCES, POSITION_AGGS
+        )
+        return self._positions_from_buckets(buckets)
+
+    @staticmethod
+    def _positions_from_buckets(buckets: list[dict]) -> dict[tuple[str, str], dict]:
+        """Turn composite (market_id, side) buckets into net positions with avg entry prices."""
         result = {}
-        for key, pos in positions.items():
-            net_qty = pos["open_quantity"] - pos["close_quantity"]
-            avg_entry = (
-                pos["open_cost"] / pos["open_quantity"]
-                if pos["open_quantity"] > 0
-                else 0.0
-            )
-            result[key] = {
-                "net_quantity": net_qty,
-                "avg_entry_price": avg_entry,
-                "open_quantity": pos["open_quantity"],
-                "open_cost": pos["open_cost"],
-                "close_quantity": pos["close_quantity"],
-                "close_revenue": pos["close_revenue"],
-                "last_trade_date": pos["last_trade_date"],
+        for bucket in buckets:
+            open_qty = bucket["open"]["quantity"]["value"]
+            open_cost = bucket["open"]["notional"]["value"]
+            close_qty = bucket["close"]["quantity"]["value"]
+            result[(bucket["key"]["market_id"], bucket["key"]["side"])] = {
+                "net_quantity": open_qty - close_qty,
+                "avg_entry_price": open_cost / open_qty if open_qty > 0 else 0.0,
+                "open_quantity": open_qty,
+                "open_cost": open_cost,
+                "close_quantity": close_qty,
+                "close_revenue": bucket["close"]["notional"]["value"],
+                "last_trade_date": bucket["last_trade"].get("value_as_string", ""),
             }
-
         return result
 
-    async def _fetch_equity_data(self) -> tuple[list[dict], dict]:
-        """Fetch (trades sorted ASC, daily_prices) from ES — reusable for all curve variants."""
-        import asyncio
-        from datetime import date as date_cls, timedelta
+    async def _fetch_equity_data(
+        self, all_trades: list[dict] | None = None
+    ) -> tuple[list[dict], list[str], dict, tuple | None]:
+        """Fetch (trades sorted ASC, dates, daily_prices, data key) from ES — reusable for all curve variants.
 
-        all_trades = await self._get_all_trades()
+        `dates` is the contiguous, sorted first-trade → experiment-end day range; the
+        data key (see _equity_data_key) identifies the inputs for the curve cache.
+        """
+        if all_trades is None:
+            all_trades = await self._get_all_trades()
         if not all_trades:
-            return all_trades, {}
+            return all_trades, [], {}, None
 
         # Cap all data at the experiment end date
         trades = [t for t in all_trades if t["created_at_utc"][:10] <= EXPERIMENT_END_DATE]
         if not trades:
-            return trades, {}
+            return trades, [], {}, None
 
         market_ids = list(set(t["market_id"] for t in trades))
 
         # Determine date range: first trade date → experiment end
         first_date = trades[0]["created_at_utc"][:10]
-        start = date_cls.fromisoformat(first_date)
-        end = date_cls.fromisoformat(EXPERIMENT_END_DATE)
-        dates: list[str] = []
-        d = start
-        while d <= end:
-            dates.append(d.isoformat())
-            d += timedelta(days=1)
-
-        async def fetch_day_prices(date_str: str) -> tuple[str, dict]:
-            result = await self.es.search(
-                SNAPSHOTS_INDEX,
-                query={
-                    "bool": {
-                        "must": [
-                            {"terms": {"market_id": market_ids}},
-                            {"range": {"timestamp_utc": {"lte": f"{date_str}T23:59:59Z"}}},
-                        ]
+        dates: list[str] = np.arange(
+            np.datetime64(first_date),
+            np.datetime64(EXPERIMENT_END_DATE) + np.timedelta64(1, "D"),
+            dtype="datetime64[D]",
+        ).astype(str).tolist()
+
+        day_closes = await self._fetch_daily_closes(market_ids, first_date, EXPERIMENT_END_DATE)
+        daily_prices = self._carry_forward_prices(day_closes, dates)
+
+        return trades, dates, daily_prices, self._equity_data_key(trades, day_closes)
+
+    @staticmethod
+    def _equity_data_key(trades: list[dict], day_closes: dict[str, dict[str, dict]]) -> tuple:
+        """Fingerprint of the inputs an equity curve is computed from.
+
+        Every trade and every sparse daily close is hashed, so DCA/CLOB rebackfills
+        that delete and re-create trades (same count, new ids or prices) and
+        backfilled snapshots produce a new key once _get_all_trades refreshes.
+        """
+        trade_digest = hash(tuple(
+            (t.get("trade_id"), t["created_at_utc"], t["market_id"], t["side"],
+             t["action"], t["quantity"], t["price"])
+            for t in trades
+        ))
+        prices = hash(tuple(
+            (date, mid, p["yes_price"], p["no_price"])
+            for date, closes in sorted(day_closes.items())
+            for mid, p in sorted(closes.items())
+        ))
+        return len(trades), trade_digest, prices
+
+    def _equity_curve_response(
+        self,
+        trades: list[dict],
+        dates: list[str],
+        daily_prices: dict[str, dict[str, dict]],
+        data_key: tuple,
+        flip_sides: bool,
+    ) -> EquityCurveResponse:
+        """Curve + stats for one data key, served from the LRU curve cache when possible.
+
+        Callers must treat the returned response as read-only.
+        """
+        key = (data_key, flip_sides)
+        cached = self._curve_cache.get(key)
+        if cached is not None:
+            self._curve_cache.move_to_end(key)
+            return cached
+        curve = self._compute_equity_curve(trades, daily_prices, dates, flip_sides=flip_sides)
+        response = EquityCurveResponse(curve=curve, stats=self._compute_portfolio_stats(trades, curve))
+        self._curve_cache[key] = response
+        if len(self._curve_cache) > EQUITY_CURVE_CACHE_SIZE:
+            self._curve_cache.popitem(last=False)
+        return response
+
+    async def _fetch_daily_closes(
+        self, market_ids: list[str], start_date: str, end_date: str
+    ) -> dict[str, dict[str, dict]]:
+        """Last snapshot price per market per day in [start_date, end_date], via date_histogram aggs.
+
+        Returns a sparse date -> {market_id -> {yes_price, no_price}} map (days with
+        no snapshot for a market are absent). Each market's last price before
+        start_date, if any, is filed under the day before start_date so carry-forward
+        starts from it. Market ids are chunked from the actual day span so days ×
+        markets stays under ES's search.max_buckets limit.
+
+        The size:0 bodies are byte-identical across calls for the same markets and
+        dates (ids are sorted first), so repeat curve loads hit the shard request
+        cache, which is enabled by default on snapshots_wide.
+        """
+        market_ids = sorted(market_ids)
+        n_days = int((np.datetime64(end_date) - np.datetime64(start_date)).astype(int)) + 1
+        chunk_size = max(1, min(PRICE_AGG_MARKET_CHUNK, PRICE_AGG_MAX_BUCKETS // n_days - 1))
+
+        def chunk_body(chunk: list[str]) -> dict:
+            return {
+                "size": 0,
+                "query": {"bool": {"filter": [
+                    {"terms": {"market_id": chunk}},
+                    {"range": {"timestamp_utc": {
+                        "gte": f"{start_date}T00:00:00Z", "lte": f"{end_date}T23:59:59Z",
+                    }}},
+                ]}},
+                "aggs": {
+                    "per_day": {
+                        "date_histogram": {
+                            "field": "timestamp_utc",
+                            "calendar_interval": "day",
+                            "format": "yyyy-MM-dd",
+                            "min_doc_count": 1,
+                        },
+                        "aggs": {
+                            "per_market": {
+                                "terms": {"field": "market_id", "size": len(chunk)},
+                                "aggs": {
+                                    "last": {
+                                        "top_metrics": {
+                                            "metrics": [{"field": "yes_price"}, {"field": "no_price"}],
+                                            "sort": {"timestamp_utc": "desc"},
+                                        }
+                                    }
+                                },
+                            }
+                        },
                     }
                 },
-                sort=[{"timestamp_utc": {"order": "desc"}}],
+            }
+
+        # All chunks go out in a single _msearch round-trip, alongside the seed lookup
+        results, seed = await asyncio.gather(
+            self.es.msearch(SNAPSHOTS_INDEX, [
+                chunk_body(market_ids[i : i + chunk_size])
+                for i in range(0, len(market_ids), chunk_size)
+            ], request_cache=True, pre_filter_shard_size=1),
+            self.es.latest_metrics_by(
+                SNAPSHOTS_INDEX,
+                query={"bool": {"filter": [
+                    {"terms": {"market_id": market_ids}},
+                    {"range": {"timestamp_utc": {"lt": f"{start_date}T00:00:00Z"}}},
+                ]}},
+                fields=SNAPSHOT_PRICE_FIELDS,
+                group_field="market_id",
                 size=len(market_ids),
-                collapse="market_id",
-            )
-            prices = {}
-            for hit in result["hits"]["hits"]:
-                s = hit["_source"]
-                prices[s["market_id"]] = {
-                    "yes_price": float(s["yes_price"]),
-                    "no_price": float(s["no_price"]),
-                }
-            return date_str, prices
+            ),
+        )
 
-        daily_prices: dict[str, dict] = {}
-        for i in range(0, len(dates), 10):
-            batch = dates[i : i + 10]
-            results = await asyncio.gather(*(fetch_day_prices(d) for d in batch))
-            for date_str, prices in results:
-                if prices:
-                    daily_prices[date_str] = prices
+        day_closes: dict[str, dict[str, dict]] = defaultdict(dict)
+        if seed:
+            seed_date = str(np.datetime64(start_date) - np.timedelta64(1, "D"))
+            day_closes[seed_date] = {
+                mid: {"yes_price": float(m["yes_price"]), "no_price": float(m["no_price"])}
+                for mid, m in seed.items()
+            }
+        for result in results:
+            for day in result["aggregations"]["per_day"]["buckets"]:
+                prices = day_closes[day["key_as_string"]]
+                for bucket in day["per_market"]["buckets"]:
+                    top = bucket["last"]["top"]
+                    if top:
+                        m = top[0]["metrics"]
+                        prices[bucket["key"]] = {
+                            "yes_price": float(m["yes_price"]),
+                            "no_price": float(m["no_price"]),
+                        }
+        return day_closes
 
-        return trades, daily_prices
+    @staticmethod
+    def _carry_forward_prices(
+        day_closes: dict[str, dict[str, dict]], dates: list[str]
+    ) -> dict[str, dict[str, dict]]:
+        """Expand sparse daily closes into the latest known price per market for each date.
 
-    async def get_equity_curve(self, flip_sides: bool = False) -> EquityCurveResponse:
+        Closes dated before dates[0] seed the starting state; dates with no price for
+        any market yet are omitted.
+        """
+        daily_prices: dict[str, dict[str, dict]] = {}
+        close_dates = sorted(day_closes)
+        current: dict[str, dict] = {}
+        i = 0
+        for date in dates:
+            while i < len(close_dates) and close_dates[i] <= date:
+                current.update(day_closes[close_dates[i]])
+                i += 1
+            if current:
+                daily_prices[date] = dict(current)
+        return daily_prices
+
+    async def get_equity_curve(
+        self, flip_sides: bool = False, all_trades: list[dict] | None = None
+    ) -> EquityCurveResponse:
         """Compute equity curve with mark-to-market unrealized P&L.
 
         Args:
             flip_sides: If True, swap YES↔NO on all trades to simulate betting
                         against Trump (opposite of current positions).
+            all_trades: Optional pre-fetched trades (ASC) to avoid a second ES scan.
         """
-        trades, daily_prices = await self._fetch_equity_data()
+        trades, dates, daily_prices, data_key = await self._fetch_equity_data(all_trades)
         if not trades:
             return EquityCurveResponse(curve=[], stats=PortfolioStats())
-        curve = self._compute_equity_curve(trades, daily_prices, flip_sides=flip_sides)
-        stats = self._compute_portfolio_stats(trades, curve)
-        return EquityCurveResponse(curve=curve, stats=stats)
+        return self._equity_curve_response(trades, dates, daily_prices, data_key, flip_sides)
 
     async def get_equity_curve_dual(self) -> dict:
         """Compute both pro-Trump and anti-Trump equity curves from a single ES fetch."""
-        trades, daily_prices = await self._fetch_equity_data()
+        trades, dates, daily_prices, data_key = await self._fetch_equity_data()
         if not trades:
             empty = EquityCurveResponse(curve=[], stats=PortfolioStats())
             return {"pro_trump": empty.model_dump(mode="json"), "anti_trump": empty.model_dump(mode="json")}
-        pro_curve = self._compute_equity_curve(trades, daily_prices, flip_sides=False)
-        anti_curve = self._compute_equity_curve(trades, daily_prices, flip_sides=True)
-        pro = EquityCurveResponse(curve=pro_curve, stats=self._compute_portfolio_stats(trades, pro_curve))
-        anti = EquityCurveResponse(curve=anti_curve, stats=self._compute_portfolio_stats(trades, anti_curve))
+        pro = self._equity_curve_response(trades, dates, daily_prices, data_key, flip_sides=False)
+        anti = self._equity_curve_response(trades, dates, daily_prices, data_key, flip_sides=True)
         return {"pro_trump": pro.model_dump(mode="json"), "anti_trump": anti.model_dump(mode="json")}
 
+    @staticmethod
+    def _trades_by_date(trades: list[dict]) -> dict[str, list[dict]]:
+        """Bucket trades by created_at_utc day, keeping each day's trades in order.
+
+        Trades arrive from ES sorted by created_at_utc, so each day is one contiguous
+        run: its end is found by bisecting for the first timestamp past that day and
+        the run is sliced off, instead of hashing every trade into a bucket.
+        Unsorted input falls back to per-trade bucketing.
+        """
+        stamps = [t.get("created_at_utc", "") for t in trades]
+        if not all(map(operator.le, stamps, stamps[1:])):
+            by_date: dict[str, list[dict]] = defaultdict(list)
+            for t, ts in zip(trades, stamps):
+                if ts:
+                    by_date[ts[:10]].append(t)
+            return dict(by_date)
+
+        by_date = {}
+        lo = bisect_left(stamps, "0")  # trades with no timestamp sort first; skip them
+        while lo < len(stamps):
+            date = stamps[lo][:10]
+            # "\x7f" sorts after every character that follows the date in an ISO timestamp
+            hi = bisect_left(stamps, date + "\x7f", lo)
+            by_date[date] = trades[lo:hi]
+            lo = hi
+        return by_date
+
+    @staticmethod
+    def _active_dates(
+        trades_by_date: dict[str, list[dict]],
+        daily_prices: dict[str, dict],
+        dates: list[str] | None,
+    ) -> list[str]:
+        """All dates with either trades or snapshot prices, in order.
+
+        With the pre-sorted range from _fetch_equity_data this is a single
+        O(D) pass; otherwise the key sets are merged and sorted.
+        """
+        if dates is None:
+            return sorted(trades_by_date.keys() | daily_prices.keys())
+        return [d for d in dates if d in trades_by_date or d in daily_prices]
+
     @staticmethod
     def _compute_equity_curve(
         trades: list[dict],
         daily_prices: dict[str, dict[str, dict]],
+        dates: list[str] | None = None,
         flip_sides: bool = False,
     ) -> list[EquityCurvePoint]:
         """Replay trades chronologically and mark-to-market using daily snapshot prices.
@@ -588,105 +1180,128 @@ class PaperTradingService:
         Args:
             trades: list of trade dicts sorted by created_at_utc asc
             daily_prices: date -> {market_id -> {yes_price, no_price}}
+            dates: sorted date range covering every trade and price date, if known
             flip_sides: swap YES↔NO to simulate the opposite betting direction
         """
         if not trades:
             return []
 
-        # Group trades by date
-        trades_by_date: dict[str, list[dict]] = defaultdict(list)
-        for t in trades:
-            date = t.get("created_at_utc", "")[:10]
-            if date:
-                trades_by_date[date].append(t)
+        trades_by_date = PaperTradingService._trades_by_date(trades)
 
-        # All dates with either trades or snapshot prices
-        all_dates = sorted(set(list(trades_by_date.keys()) + list(daily_prices.keys())))
+        all_dates = PaperTradingService._active_dates(trades_by_date, daily_prices, dates)
 
-        open_tracker: dict[tuple[str, str], list[tuple[float, float]]] = defaultdict(list)
+        open_tracker: dict[tuple[str, str], deque] = defaultdict(deque)
         cumulative_invested = 0.0
         cumulative_realized = 0.0
         total_opens = 0
         total_closes = 0
-        last_known_prices: dict[str, dict] = {}  # market_id -> {yes_price, no_price}
-
-        curve: list[EquityCurvePoint] = []
 
-        for date in all_dates:
+        # Positions and markets get fixed integer slots; state is recorded into dense
+        # (dates x slots) arrays and every date is marked to market in one pass.
+        midx = {mid: i for i, mid in enumerate(dict.fromkeys(t["market_id"] for t in trades))}
+        pidx: dict[tuple[str, str], int] = {}
+        for t in trades:
+            side = t["side"]
+            if flip_sides:
+                side = "NO" if side == "YES" else "YES"
+            pidx.setdefault((t["market_id"], side), len(pidx))
+        open_qty = np.zeros(len(pidx))
+        open_cost = np.zeros(len(pidx))  # kept in step with open_tracker
+        pos_mkt = np.fromiter((midx[mid] for mid, _ in pidx), dtype=np.intp, count=len(pidx))
+        pos_yes = np.fromiter((side == "YES" for _, side in pidx), dtype=bool, count=len(pidx))
+
+        yes_px = np.full(len(midx), np.nan)
+        no_px = np.full(len(midx), np.nan)
+
+        # End-of-day state, one row per date: positions, latest known prices, and
+        # running (invested, realized, opens, closes) totals
+        shape = (len(all_dates), len(pidx))
+        qty_at = np.empty(shape)
+        cost_at = np.empty(shape)
+        yes_at = np.empty((len(all_dates), len(midx)))
+        no_at = np.empty((len(all_dates), len(midx)))
+        totals_at = np.empty((len(all_dates), 4))
+
+        for d, date in enumerate(all_dates):
             # 1. Process trades for this date
-            for t in trades_by_date.get(date, []):
-                mid = t["market_id"]
-                original_side = t["side"]
-                effective_side = ("NO" if original_side == "YES" else "YES") if flip_sides else original_side
-                key = (mid, effective_side)
-                qty = float(t["quantity"])
-
-                if flip_sides:
-                    # Use the opposite side's snapshot price on the trade date.
-                    price_field = "yes_price" if effective_side == "YES" else "no_price"
-                    day_snap = daily_prices.get(date, {}).get(mid)
-                    if day_snap:
-                        price = float(day_snap[price_field])
+            day_trades = trades_by_date.get(date)
+            if day_trades:
+                for t in day_trades:
+                    mid = t["market_id"]
+                    original_side = t["side"]
+                    effective_side = ("NO" if original_side == "YES" else "YES") if flip_sides else original_side
+                    key = (mid, effective_side)
+                    qty = float(t["quantity"])
+
+                    if flip_sides:
+                        # Use the opposite side's snapshot price on the trade date.
+                        price_field = "yes_price" if effective_side == "YES" else "no_price"
+                        day_snap = daily_prices.get(date, {}).get(mid)
+                        if day_snap:
+                            price = float(day_snap[price_field])
+                        else:
+                            # Fallback: complement of stored price (yes + no ≈ 1)
+                            price = max(0.0, 1.0 - float(t["price"]))
                     else:
-                        # Fallback: complement of stored price (yes + no ≈ 1)
-                        price = max(0.0, 1.0 - float(t["price"]))
-                else:
-                    price = float(t["price"])
-
-                if t["action"] == "OPEN":
-                    open_tracker[key].append((qty, price))
-                    cumulative_invested += qty * price
-                    total_opens += 1
-                elif t["action"] == "CLOSE":
-                    remaining = qty
-                    while remaining > 0 and open_tracker[key]:
-                        open_qty, open_price = open_tracker[key][0]
-                        matched = min(remaining, open_qty)
-                        cumulative_realized += matched * (price - open_price)
-                        remaining -= matched
-                        if matched >= open_qty:
-                            open_tracker[key].pop(0)
+                        price = float(t["price"])
+
+                    p = pidx[key]
+                    if t["action"] == "OPEN":
+                        open_tracker[key].append((qty, price))
+                        open_qty[p] += qty
+                        open_cost[p] += qty * price
+                        cumulative_invested += qty * price
+                        total_opens += 1
+                    elif t["action"] == "CLOSE":
+                        matched_qty = min(qty, open_qty[p])
+                        realized = fifo_close(open_tracker[key], qty, price)
+                        cumulative_realized += realized
+                        if open_tracker[key]:
+                            # Matched lots' cost = proceeds minus the P&L they realized
+                            open_qty[p] -= matched_qty
+                            open_cost[p] -= matched_qty * price - realized
                         else:
-                            open_tracker[key][0] = (open_qty - matched, open_price)
-                    total_closes += 1
+                            open_qty[p] = open_cost[p] = 0.0
+                        total_closes += 1
 
             # 2. Update latest known prices from snapshots
-            if date in daily_prices:
-                for mid, prices in daily_prices[date].items():
-                    last_known_prices[mid] = prices
-
-            # 3. Compute unrealized P&L from open positions at current prices
-            unrealized = 0.0
-            portfolio_value = 0.0
-            for (mid, side), lots in open_tracker.items():
-                total_qty = sum(q for q, _ in lots)
-                if total_qty <= 0:
-                    continue
-                prices = last_known_prices.get(mid)
-                if prices:
-                    cp = prices["yes_price"] if side == "YES" else prices["no_price"]
-                else:
-                    # Fallback: use average entry price (no snapshot yet)
-                    cp = sum(q * p for q, p in lots) / total_qty
-                pv = total_qty * cp
-                cost = sum(q * p for q, p in lots)
-                unrealized += pv - cost
-                portfolio_value += pv
-
-            total_pnl = unrealized + cumulative_realized
-
-            curve.append(EquityCurvePoint(
+            day_prices = daily_prices.get(date)
+            if day_prices:
+                for mid, prices in day_prices.items():
+                    i = midx.get(mid)
+                    if i is not None:
+                        yes_px[i] = prices["yes_price"]
+                        no_px[i] = prices["no_price"]
+
+            qty_at[d] = open_qty
+            cost_at[d] = open_cost
+            yes_at[d] = yes_px
+            no_at[d] = no_px
+            totals_at[d] = (cumulative_invested, cumulative_realized, total_opens, total_closes)
+
+        # 3. Mark every date's open positions to market in one vectorized pass
+        unrealized, portfolio_value = mark_to_market(qty_at, cost_at, pos_mkt, pos_yes, yes_at, no_at)
+        total_pnl = unrealized + totals_at[:, 1]
+
+        return [
+            EquityCurvePoint(
                 date=date,
-                total_pnl=round(total_pnl, 4),
-                unrealized_pnl=round(unrealized, 4),
-                realized_pnl=round(cumulative_realized, 4),
-                cumulative_invested=round(cumulative_invested, 4),
-                portfolio_value=round(portfolio_value, 4),
-                total_open_trades=total_opens,
-                total_close_trades=total_closes,
-            ))
-
-        return curve
+                total_pnl=round(pnl, 4),
+                unrealized_pnl=round(unrl, 4),
+                realized_pnl=round(realized, 4),
+                cumulative_invested=round(invested, 4),
+                portfolio_value=round(value, 4),
+                total_open_trades=int(opens),
+                total_close_trades=int(closes),
+            )
+            for date, pnl, unrl, value, (invested, realized, opens, closes) in zip(
+                all_dates,
+                total_pnl.tolist(),
+                unrealized.tolist(),
+                portfolio_value.tolist(),
+                totals_at.tolist(),
+            )
+        ]
 
     @staticmethod
     def _compute_portfolio_stats(trades: list[dict], curve: list[EquityCurvePoint]) -> PortfolioStats:
@@ -696,83 +1311,49 @@ class PaperTradingService:
         if not trades and not curve:
             return stats
 
-        # Compute per-close P&L using FIFO (for win/loss stats)
-        open_tracker: dict[tuple[str, str], list[tuple[float, float]]] = defaultdict(list)
-        close_pnls: list[float] = []
-
-        for t in trades:
-            key = (t["market_id"], t["side"])
-            qty = float(t["quantity"])
-            price = float(t["price"])
-
-            if t["action"] == "OPEN":
-                open_tracker[key].append((qty, price))
-            elif t["action"] == "CLOSE":
-                remaining = qty
-                trade_pnl = 0.0
-                while remaining > 0 and open_tracker[key]:
-                    open_qty, open_price = open_tracker[key][0]
-                    matched = min(remaining, open_qty)
-                    trade_pnl += matched * (price - open_price)
-                    remaining -= matched
-                    if matched >= open_qty:
-                        open_tracker[key].pop(0)
-                    else:
-                        open_tracker[key][0] = (open_qty - matched, open_price)
-                close_pnls.append(trade_pnl)
+        # Per-close P&L using FIFO (for win/loss stats); rounding keeps float noise on
+        # break-even closes from counting as a win or a loss
+        codes, is_open, qty, price = fifo_arrays(trades)
+        close_pnls = np.round(fifo_trade_pnls(codes, is_open, qty, price)[~is_open], 9)
 
         # Win/loss stats from closed trades
-        if close_pnls:
-            wins = [p for p in close_pnls if p > 0]
-            losses = [p for p in close_pnls if p < 0]
-            stats.total_wins = len(wins)
-            stats.total_losses = len(losses)
-            stats.win_rate = round(len(wins) / len(close_pnls) * 100, 2)
-            stats.avg_win = round(sum(wins) / len(wins), 4) if wins else 0.0
-            stats.avg_loss = round(sum(losses) / len(losses), 4) if losses else 0.0
-            total_win_amount = sum(wins) if wins else 0.0
-            total_loss_amount = abs(sum(losses)) if losses else 0.0
+        if close_pnls.size:
+            wins = close_pnls[close_pnls > 0]
+            losses = close_pnls[close_pnls < 0]
+            total_win_amount = float(wins.sum())
+            total_loss_amount = float(-losses.sum())
+            stats.total_wins = int(wins.size)
+            stats.total_losses = int(losses.size)
+            stats.win_rate = round(wins.size / close_pnls.size * 100, 2)
+            stats.avg_win = round(total_win_amount / wins.size, 4) if wins.size else 0.0
+            stats.avg_loss = round(-total_loss_amount / losses.size, 4) if losses.size else 0.0
             stats.profit_factor = round(total_win_amount / total_loss_amount, 4) if total_loss_amount > 0 else None
 
-        # Sharpe ratio from daily changes in total P&L (unrealized + realized)
-        if len(curve) >= 2:
-            daily_changes = [
-                curve[i].total_pnl - curve[i - 1].total_pnl
-                for i in range(1, len(curve))
-            ]
-            import numpy as np
-            arr = np.array(daily_changes)
-            mean_change = float(np.mean(arr))
-            std_change = float(np.std(arr, ddof=1))
+        if not curve:
+            return stats
+
+        # One contiguous buffer of total P&L (unrealized + realized) feeds every curve stat
+        pnl = np.fromiter((pt.total_pnl for pt in curve), dtype=np.float64, count=len(curve))
+
+        # Sharpe ratio from daily changes in total P&L
+        if len(pnl) >= 2:
+            diffs = np.diff(pnl)
+            std_change = float(diffs.std(ddof=1))
             if std_change > 0:
-                stats.sharpe_ratio = round(mean_change / std_change, 4)
+                stats.sharpe_ratio = round(float(diffs.mean()) / std_change, 4)
 
         # Max drawdown on total P&L
-        if curve:
-            pnl_values = [pt.total_pnl for pt in curve]
-            peak = pnl_values[0]
-            max_dd = 0.0
-            for v in pnl_values:
-                if v > peak:
-                    peak = v
-                dd = peak - v
-                if dd > max_dd:
-                    max_dd = dd
-            stats.max_drawdown = round(max_dd, 4)
+        stats.max_drawdown = round(float((np.maximum.accumulate(pnl) - pnl).max()), 4)
 
         # Linear regression on total P&L
-        if len(curve) >= 3:
-            import numpy as np
-            from scipy.stats import linregress
-            x = np.arange(len(curve), dtype=float)
-            y = np.array([pt.total_pnl for pt in curve])
-            result = linregress(x, y)
-            stats.regression_slope = round(float(result.slope), 6)
-            stats.regression_r_squared = round(float(result.rvalue ** 2), 4)
-            stats.regression_p_value = round(float(result.pvalue), 6)
-            stats.trend_significant = bool(result.pvalue < 0.05)
+        if len(pnl) >= 3:
+            slope, r_squared, p_value = linear_trend(pnl)
+            stats.regression_slope = round(slope, 6)
+            stats.regression_r_squared = round(r_squared, 4)
+            stats.regression_p_value = round(p_value, 6)
+            stats.trend_significant = bool(p_value < 0.05)
             if stats.trend_significant:
-                stats.trend_direction = "up" if result.slope > 0 else "down"
+                stats.trend_direction = "up" if slope > 0 else "down"
             else:
                 stats.trend_direction = "none"
 
@@ -783,26 +1364,23 @@ class PaperTradingService:
 
         Used as the precomputation step for Monte Carlo sampling.
         """
-        trades, daily_prices = await self._fetch_equity_data()
+        trades, dates, daily_prices, _ = await self._fetch_equity_data()
         if not trades:
             return {}
-        return self._compute_market_pnl_breakdown(trades, daily_prices)
+        return self._compute_market_pnl_breakdown(trades, daily_prices, dates)
 
     @staticmethod
     def _compute_market_pnl_breakdown(
         trades: list[dict],
         daily_prices: dict[str, dict[str, dict]],
+        dates: list[str] | None = None,
     ) -> dict[str, float]:
         """Same FIFO + mark-to-market replay as equity curve, but aggregated per market_id."""
-        trades_by_date: dict[str, list[dict]] = defaultdict(list)
-        for t in trades:
-            date = t.get("created_at_utc", "")[:10]
-            if date:
-                trades_by_date[date].append(t)
+        trades_by_date = PaperTradingService._trades_by_date(trades)
 
-        all_dates = sorted(set(list(trades_by_date.keys()) + list(daily_prices.keys())))
+        all_dates = PaperTradingService._active_dates(trades_by_date, daily_prices, dates)
 
-        open_tracker: dict[tuple[str, str], list[tuple[float, float]]] = defaultdict(list)
+        open_tracker: dict[tuple[str, str], deque] = defaultdict(deque)
         realized_per_market: dict[str, float] = defaultdict(float)
         last_known_prices: dict[str, dict] = {}
 
@@ -816,16 +1394,10 @@ class PaperTradingService:
                 if t["action"] == "OPEN":
                     open_tracker[key].append((qty, price))
                 elif t["action"] == "CLOSE":
-                    remaining = qty
-                    while remaining > 0 and open_tracker[key]:
-                        open_qty, open_price = open_tracker[key][0]
-                        matched = min(remaining, open_qty)
-                        realized_per_market[mid] += matched * (price - open_price)
-                        remaining -= matched
-                        if matched >= open_qty:
-                            open_tracker[key].pop(0)
-                        else:
-                            open_tracker[key][0] = (open_qty - matched, open_price)
+                    lots = open_tracker[key]
+                    # Unmatched closes realize nothing and must not list the market
+                    if qty > 0 and lots:
+                        realized_per_market[mid] += fifo_close(lots, qty, price)
 
             if date in daily_prices:
                 for mid, prices in daily_prices[date].items():
@@ -939,30 +1511,7 @@ class PaperTradingService:
             )
         return output
 
-    async def _compute_realized_pnl(self, trades: list[dict]) -> float:
-        """Compute realized P&L from closed trades."""
-        # Group trades by (market_id, side), compute avg entry, then realized on closes
-        open_tracker: dict[tuple[str, str], list[tuple[float, float]]] = defaultdict(list)
-        realized = 0.0
-
-        for t in trades:
-            key = (t["market_id"], t["side"])
-            qty = float(t["quantity"])
-            price = float(t["price"])
-
-            if t["action"] == "OPEN":
-                open_tracker[key].append((qty, price))
-            elif t["action"] == "CLOSE":
-                # FIFO: close against earliest opens
-                remaining = qty
-                while remaining > 0 and open_tracker[key]:
-                    open_qty, open_price = open_tracker[key][0]
-                    matched = min(remaining, open_qty)
-                    realized += matched * (price - open_price)
-                    remaining -= matched
-                    if matched >= open_qty:
-                        open_tracker[key].pop(0)
-                    else:
-                        open_tracker[key][0] = (open_qty - matched, open_price)
-
-        return realized
+    @staticmethod
+    def _compute_realized_pnl(trades: list[dict]) -> float:
+        """Compute realized P&L from closed trades (FIFO) with the fifo_trade_pnls kernel."""
+        return float(fifo_trade_pnls(*fifo_arrays(trades)).sum())
@@ -3,8 +3,10 @@
 import logging
 from datetime import datetime, timezone
 
+from config import SETTINGS_CACHE_TTL
 from core.es_client import ESClient
 from models.settings import Settings, SettingsUpdate
+from utils.cache import ttl_cache
 
 logger = logging.getLogger(__name__)
 
@@ -22,13 +24,16 @@ class SettingsService:
         if existing is None:
             defaults = Settings()
             defaults.updated_at_utc = datetime.now(timezone.utc)
-            await self.es.index_doc(
-                SETTINGS_INDEX, SETTINGS_DOC_ID, defaults.model_dump(mode="json")
-            )
+            await self.es.index_doc(SETTINGS_INDEX, SETTINGS_DOC_ID, defaults.model_dump())
+            SettingsService.get.invalidate(self)
             logger.info("Initialized default settings")
 
+    @ttl_cache(SETTINGS_CACHE_TTL)
     async def get(self) -> Settings:
-        """Read settings, returning defaults if missing."""
+        """Read settings, returning defaults if missing.
+
+        Cached for SETTINGS_CACHE_TTL seconds; treat the returned model as read-only.
+        """
         doc = await self.es.get(SETTINGS_INDEX, SETTINGS_DOC_ID)
         if doc is None:
             return Settings()
@@ -38,9 +43,10 @@ class SettingsService:
         """Partial update of global settings."""
         current = await self.get()
         update_data = updates.model_dump(exclude_none=True)
-        update_data["updated_at_utc"] = datetime.now(timezone.utc).isoformat()
-        merged = current.model_dump(mode="json")
+        update_data["updated_at_utc"] = datetime.now(timezone.utc)
+        merged = current.model_dump()
         merged.update(update_data)
         await self.es.index_doc(SETTINGS_INDEX, SETTINGS_DOC_ID, merged)
+        SettingsService.get.invalidate(self)
         logger.info("Updated settings: %s", list(update_data.keys()))
         return Settings(**merged)
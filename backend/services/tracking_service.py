@@ -28,11 +28,52 @@ class TrackingService:
         """Get tracking config for a single market."""
         return await self.es.get(TRACKED_INDEX, market_id)
 
+    async def get_many(self, market_ids: list[str]) -> dict[str, dict]:
+        """Get tracking configs for many markets in one mget. Missing ids are omitted."""
+        return await self.es.mget(TRACKED_INDEX, market_ids)
+
     async def set_tracking(self, market_id: str, update: TrackedMarketUpdate) -> dict:
-        """Create or update tracking configuration for a market."""
+        """Create or update tracking configuration for a market in one _update call."""
         now = datetime.now(timezone.utc).isoformat()
+        doc = await self.es.update_doc(
+            TRACKED_INDEX,
+            market_id,
+            {**update.model_dump(exclude_none=True), "updated_at_utc": now},
+            upsert=self._merge_tracking(market_id, None, update, now),
+        )
+        logger.info("Updated tracking for %s: is_tracked=%s", market_id, doc.get("is_tracked"))
+        return doc
+
+    async def set_many(self, updates: dict[str, TrackedMarketUpdate]) -> dict[str, dict]:
+        """set_tracking for many markets: one mget for existing configs, one bulk write.
 
-        existing = await self.es.get(TRACKED_INDEX, market_id)
+        Returns only the configs that were written; raises if none were.
+        """
+        if not updates:
+            return {}
+        existing = await self.get_many(list(updates))
+        now = datetime.now(timezone.utc).isoformat()
+        docs = {
+            mid: self._merge_tracking(mid, existing.get(mid), update, now)
+            for mid, update in updates.items()
+        }
+        result = await self.es.bulk_index(TRACKED_INDEX, list(docs.values()), id_field="market_id")
+        written = {mid: doc for (mid, doc), ok in zip(docs.items(), result["ok"]) if ok}
+        if result["errors"]:
+            logger.warning(
+                "Updated tracking for %d of %d markets (%d errors)", len(written), len(docs), result["errors"]
+            )
+            if not written:
+                raise RuntimeError(f"Bulk write failed for all {len(docs)} tracking configs")
+        else:
+            logger.info("Updated tracking for %d markets", len(written))
+        return written
+
+    @staticmethod
+    def _merge_tracking(
+        market_id: str, existing: dict | None, update: TrackedMarketUpdate, now: str
+    ) -> dict:
+        """Apply an update onto an existing config, or build a new one."""
         if existing:
             doc = existing
             doc.update(update.model_dump(exclude_none=True))
@@ -42,17 +83,13 @@ class TrackingService:
             doc["market_id"] = market_id
             doc["created_at_utc"] = now
             doc["updated_at_utc"] = now
-
-        await self.es.index_doc(TRACKED_INDEX, market_id, doc)
-        logger.info("Updated tracking for %s: is_tracked=%s", market_id, doc.get("is_tracked"))
         return doc
 
     async def untrack(self, market_id: str) -> bool:
         """Set is_tracked=false for a market."""
-        existing = await self.es.get(TRACKED_INDEX, market_id)
-        if not existing:
-            return False
-        existing["is_tracked"] = False
-        existing["updated_at_utc"] = datetime.now(timezone.utc).isoformat()
-        await self.es.index_doc(TRACKED_INDEX, market_id, existing)
-        return True
+        doc = await self.es.update_doc(
+            TRACKED_INDEX,
+            market_id,
+            {"is_tracked": False, "updated_at_utc": datetime.now(timezone.utc).isoformat()},
+        )
+        return doc is not None
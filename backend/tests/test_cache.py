@@ -0,0 +1,114 @@
+"""Tests for the in-process TTL cache decorator."""
+
+import asyncio
+
+from utils.cache import ttl_cache
+
+
+class _Service:
+    def __init__(self):
+        self.calls = 0
+
+    @ttl_cache(60)
+    async def fetch(self, key: str = "a") -> str:
+        self.calls += 1
+        await asyncio.sleep(0)
+        return f"{key}-{self.calls}"
+
+
+class _ExpiredService(_Service):
+    @ttl_cache(0)
+    async def fetch(self, key: str = "a") -> str:
+        self.calls += 1
+        return f"{key}-{self.calls}"
+
+
+class _BlockingService(_Service):
+    """Blocks fetches of key "a" until release is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    @ttl_cache(60)
+    async def fetch(self, key: str = "a") -> str:
+        self.calls += 1
+        calls = self.calls
+        if key == "a":
+            await self.release.wait()
+        return f"{key}-{calls}"
+
+
+class TestTtlCache:
+    def test_hit_returns_cached_value(self):
+        svc = _Service()
+        assert asyncio.run(svc.fetch()) == "a-1"
+        assert asyncio.run(svc.fetch()) == "a-1"
+        assert svc.calls == 1
+
+    def test_keyed_on_args(self):
+        svc = _Service()
+        asyncio.run(svc.fetch("a"))
+        asyncio.run(svc.fetch("b"))
+        assert svc.calls == 2
+
+    def test_per_instance(self):
+        s1, s2 = _Service(), _Service()
+        asyncio.run(s1.fetch())
+        asyncio.run(s2.fetch())
+        assert s1.calls == 1
+        assert s2.calls == 1
+
+    def test_expired_entry_refetches(self):
+        svc = _ExpiredService()
+        asyncio.run(svc.fetch())
+        asyncio.run(svc.fetch())
+        assert svc.calls == 2
+
+    def test_invalidate(self):
+        svc = _Service()
+        asyncio.run(svc.fetch())
+        _Service.fetch.invalidate(svc)
+        assert asyncio.run(svc.fetch()) == "a-2"
+
+    def test_concurrent_misses_collapse(self):
+        svc = _Service()
+
+        async def run():
+            return await asyncio.gather(*(svc.fetch() for _ in range(5)))
+
+        results = asyncio.run(run())
+        assert results == ["a-1"] * 5
+        assert svc.calls == 1
+
+    def test_misses_on_other_keys_do_not_wait(self):
+        svc = _BlockingService()
+
+        async def run():
+            slow = asyncio.create_task(svc.fetch("a"))
+            await asyncio.sleep(0)
+            fast = await asyncio.wait_for(svc.fetch("b"), timeout=1)
+            svc.release.set()
+            return fast, await slow
+
+        assert asyncio.run(run()) == ("b-2", "a-1")
+
+    def test_expired_entries_pruned_on_store(self):
+        svc = _ExpiredService()
+        asyncio.run(svc.fetch("a"))
+        asyncio.run(svc.fetch("b"))
+        entries = svc.__dict__["_ttl_cache_fetch"]["entries"]
+        assert [k[0] for k in entries] == [("b",)]
+
+    def test_invalidate_during_miss_skips_store(self):
+        svc = _BlockingService()
+
+        async def run():
+            pending = asyncio.create_task(svc.fetch("a"))
+            await asyncio.sleep(0)
+            _BlockingService.fetch.invalidate(svc)
+            svc.release.set()
+            stale = await pending
+            return stale, await svc.fetch("a")
+
+        assert asyncio.run(run()) == ("a-1", "a-2")
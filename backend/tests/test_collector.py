@@ -2,21 +2,14 @@
 
 import pytest
 
-from utils.filters import normalize_yes_no_prices
+from utils.filters import build_price_fields, normalize_yes_no_prices
 
 
 class TestSnapshotBuilding:
     """Test the snapshot document construction logic."""
 
     def _build_snapshot(self, yes_price: float, no_price: float) -> dict:
-        """Simulate building a snapshot doc from prices."""
-        return {
-            "yes_price": round(yes_price, 6),
-            "no_price": round(no_price, 6),
-            "yes_cents": round(yes_price * 100),
-            "no_cents": round(no_price * 100),
-            "spread": round(abs(yes_price - no_price), 6),
-        }
+        return build_price_fields(yes_price, no_price)
 
     def test_standard_prices(self):
         snap = self._build_snapshot(0.65, 0.35)
@@ -54,6 +47,11 @@ class TestSnapshotBuilding:
         assert snap["no_cents"] == 0
         assert snap["spread"] == pytest.approx(1.0)
 
+    def test_half_cent_rounds_up(self):
+        snap = self._build_snapshot(0.125, 0.875)
+        assert snap["yes_cents"] == 13
+        assert snap["no_cents"] == 88
+
 
 class TestOutcomePriceNormalization:
     """Test that we correctly map outcome prices to yes/no regardless of API order."""
@@ -4,6 +4,7 @@ import pytest
 from collections import OrderedDict
 
 from services.dca_service import (
+    batch_uuid4,
     group_snapshots_by_day,
     build_backfill_trades,
     compute_dca_analytics,
@@ -101,6 +102,29 @@ class TestBuildBackfillTrades:
         trades = build_backfill_trades("dca-1", "m1", "YES", 1.0, OrderedDict())
         assert trades == []
 
+    def test_trade_ids_unique(self):
+        daily = OrderedDict()
+        for day in range(1, 11):
+            daily[f"2025-01-{day:02d}"] = {"timestamp_utc": f"2025-01-{day:02d}T10:00:00Z", "yes_price": 0.5, "no_price": 0.5}
+
+        trades = build_backfill_trades("dca-1", "m1", "YES", 1.0, daily)
+        assert len({t["trade_id"] for t in trades}) == 10
+
+
+# --- batch_uuid4 ---
+
+
+class TestBatchUuid4:
+    def test_count_and_version(self):
+        import uuid
+
+        ids = batch_uuid4(5)
+        assert len(ids) == 5
+        assert all(uuid.UUID(i).version == 4 for i in ids)
+
+    def test_zero(self):
+        assert batch_uuid4(0) == []
+
 
 # --- compute_dca_analytics ---
 
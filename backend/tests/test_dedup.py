@@ -2,7 +2,15 @@
 
 from datetime import datetime, timezone
 
-from utils.dedup import generate_snapshot_doc_id, parse_snapshot_doc_id
+import numpy as np
+
+from utils.dedup import (
+    format_snapshot_ts,
+    format_snapshot_ts_array,
+    generate_snapshot_doc_id,
+    generate_snapshot_doc_ids,
+    parse_snapshot_doc_id,
+)
 
 
 class TestGenerateSnapshotDocId:
@@ -36,6 +44,29 @@ class TestGenerateSnapshotDocId:
         doc_id = generate_snapshot_doc_id(ts, "m1")
         assert "00:00:45Z" in doc_id
 
+    def test_precomputed_prefix_matches(self):
+        ts = datetime(2025, 4, 2, 8, 15, 30, tzinfo=timezone.utc)
+        prefix = format_snapshot_ts(ts)
+        assert generate_snapshot_doc_id(ts, "m1", ts_str=prefix) == generate_snapshot_doc_id(ts, "m1")
+
+
+class TestGenerateSnapshotDocIds:
+    def test_matches_scalar_ids(self):
+        stamps = [
+            datetime(2025, 2, 9, 15, 30, 0, tzinfo=timezone.utc),
+            datetime(2025, 12, 31, 23, 59, 59, tzinfo=timezone.utc),
+        ]
+        epochs = np.array([int(ts.timestamp()) for ts in stamps])
+        ids = generate_snapshot_doc_ids(epochs, "m1").tolist()
+        assert ids == [generate_snapshot_doc_id(ts, "m1") for ts in stamps]
+
+    def test_per_row_market_ids_and_prefix(self):
+        epochs = np.array([0, 60])
+        prefixes = format_snapshot_ts_array(epochs)
+        assert prefixes.tolist() == ["1970-01-01T00:00:00Z", "1970-01-01T00:01:00Z"]
+        ids = generate_snapshot_doc_ids(epochs, np.array(["a", "b"]), ts_strs=prefixes)
+        assert ids.tolist() == ["1970-01-01T00:00:00Z|a", "1970-01-01T00:01:00Z|b"]
+
 
 class TestParseSnapshotDocId:
     def test_roundtrip(self):
@@ -1,9 +1,11 @@
 """Tests for equity curve computation and portfolio statistics."""
 
 import pytest
-from collections import defaultdict
+from collections import defaultdict, deque
 
-from services.paper_trading_service import PaperTradingService
+import numpy as np
+
+from services.paper_trading_service import PaperTradingService, fifo_close, linear_trend, mark_to_market, replay_fifo
 from models.paper_trade import EquityCurvePoint, PortfolioStats
 
 
@@ -53,6 +55,23 @@ class TestComputeEquityCurve:
         assert curve[1].unrealized_pnl == pytest.approx(2.0)
         assert curve[1].portfolio_value == pytest.approx(6.0)
 
+    def test_partial_close_across_lots(self):
+        """A close spanning two lots leaves the newer lot's remainder at its own cost."""
+        trades = [
+            {"market_id": "m1", "side": "YES", "action": "OPEN",
+             "quantity": 10, "price": 0.40, "created_at_utc": "2026-01-10T12:00:00Z"},
+            {"market_id": "m1", "side": "YES", "action": "OPEN",
+             "quantity": 10, "price": 0.60, "created_at_utc": "2026-01-10T13:00:00Z"},
+            {"market_id": "m1", "side": "YES", "action": "CLOSE",
+             "quantity": 15, "price": 0.50, "created_at_utc": "2026-01-11T12:00:00Z"},
+        ]
+        daily_prices = {"2026-01-12": {"m1": {"yes_price": 0.70, "no_price": 0.30}}}
+        curve = PaperTradingService._compute_equity_curve(trades, daily_prices)
+        # Realized: 10*(0.50-0.40) + 5*(0.50-0.60) = 0.5; 5 left @ 0.60
+        assert curve[-1].realized_pnl == pytest.approx(0.5)
+        assert curve[-1].unrealized_pnl == pytest.approx(5 * 0.70 - 3.0)
+        assert curve[-1].portfolio_value == pytest.approx(3.5)
+
     def test_unrealized_loss(self):
         """Price goes down → negative unrealized P&L."""
         trades = [
@@ -159,6 +178,135 @@ class TestComputeEquityCurve:
         assert curve[1].total_pnl == pytest.approx(2.0)  # 10*(0.60-0.40)
 
 
+class TestActiveDates:
+    def test_range_matches_merged_keys(self):
+        trades_by_date = {"2026-01-10": [{}], "2026-01-13": [{}]}
+        daily_prices = {"2026-01-11": {}, "2026-01-13": {}}
+        dates = ["2026-01-10", "2026-01-11", "2026-01-12", "2026-01-13"]
+        expected = ["2026-01-10", "2026-01-11", "2026-01-13"]
+        assert PaperTradingService._active_dates(trades_by_date, daily_prices, dates) == expected
+        assert PaperTradingService._active_dates(trades_by_date, daily_prices, None) == expected
+
+
+class TestTradesByDate:
+    def _trade(self, ts):
+        return {"market_id": "m1", "created_at_utc": ts}
+
+    def test_sorted_runs(self):
+        trades = [self._trade(ts) for ts in (
+            "2026-01-10T09:00:00Z", "2026-01-10T23:59:59Z", "2026-01-12T00:00:00Z",
+        )]
+        result = PaperTradingService._trades_by_date(trades)
+        assert list(result) == ["2026-01-10", "2026-01-12"]
+        assert result["2026-01-10"] == trades[:2]
+        assert result["2026-01-12"] == trades[2:]
+
+    def test_unsorted_and_missing_timestamps(self):
+        trades = [self._trade(ts) for ts in (
+            "2026-01-12T00:00:00Z", "", "2026-01-10T09:00:00Z", "2026-01-12T05:00:00Z",
+        )]
+        result = PaperTradingService._trades_by_date(trades)
+        assert result == {"2026-01-12": [trades[0], trades[3]], "2026-01-10": [trades[2]]}
+
+    def test_skips_missing_timestamps_when_sorted(self):
+        trades = [self._trade(""), self._trade("2026-01-10T09:00:00Z")]
+        assert PaperTradingService._trades_by_date(trades) == {"2026-01-10": trades[1:]}
+
+
+class TestEquityCurveCache:
+    TRADES = [
+        {"trade_id": "t1", "market_id": "m1", "side": "YES", "action": "OPEN",
+         "quantity": 10, "price": 0.40, "created_at_utc": "2026-01-10T12:00:00Z"},
+    ]
+    CLOSES = {"2026-01-10": {"m1": {"yes_price": 0.5, "no_price": 0.5}}}
+
+    def test_key_tracks_trades_and_prices(self):
+        key = PaperTradingService._equity_data_key(self.TRADES, self.CLOSES)
+        assert key == PaperTradingService._equity_data_key(list(self.TRADES), dict(self.CLOSES))
+        more = self.TRADES + [dict(self.TRADES[0], trade_id="t2")]
+        assert PaperTradingService._equity_data_key(more, self.CLOSES) != key
+        repriced = {"2026-01-10": {"m1": {"yes_price": 0.6, "no_price": 0.4}}}
+        assert PaperTradingService._equity_data_key(self.TRADES, repriced) != key
+
+    def test_key_tracks_replaced_trade_with_same_count(self):
+        key = PaperTradingService._equity_data_key(self.TRADES, self.CLOSES)
+        rebackfilled = [dict(self.TRADES[0], trade_id="t1-new", price=0.42)]
+        assert PaperTradingService._equity_data_key(rebackfilled, self.CLOSES) != key
+        manual = {"trade_id": "t9", "market_id": "m2", "side": "NO", "action": "OPEN",
+                  "quantity": 5, "price": 0.30, "created_at_utc": "2026-01-11T12:00:00Z"}
+        before = PaperTradingService._equity_data_key(self.TRADES + [manual], self.CLOSES)
+        after = PaperTradingService._equity_data_key(rebackfilled + [manual], self.CLOSES)
+        assert after != before
+
+    def test_reuses_response_per_key_and_side(self):
+        svc = PaperTradingService(es=None)
+        key = PaperTradingService._equity_data_key(self.TRADES, self.CLOSES)
+        args = (self.TRADES, ["2026-01-10"], self.CLOSES, key)
+        pro = svc._equity_curve_response(*args, flip_sides=False)
+        assert svc._equity_curve_response(*args, flip_sides=False) is pro
+        assert svc._equity_curve_response(*args, flip_sides=True) is not pro
+        assert pro.curve[0].total_pnl == pytest.approx(1.0)
+        svc._invalidate_trade_caches()
+        assert svc._equity_curve_response(*args, flip_sides=False) is not pro
+
+
+class TestMarketPnlBreakdown:
+    def test_realized_and_unrealized_per_market(self):
+        trades = [
+            {"market_id": "m1", "side": "YES", "action": "OPEN",
+             "quantity": 10, "price": 0.40, "created_at_utc": "2026-01-10T12:00:00Z"},
+            {"market_id": "m1", "side": "YES", "action": "CLOSE",
+             "quantity": 5, "price": 0.60, "created_at_utc": "2026-01-11T12:00:00Z"},
+        ]
+        daily_prices = {"2026-01-11": {"m1": {"yes_price": 0.50, "no_price": 0.50}}}
+        result = PaperTradingService._compute_market_pnl_breakdown(trades, daily_prices)
+        # realized 5*(0.60-0.40)=1.0, unrealized 5*(0.50-0.40)=0.5
+        assert result == {"m1": pytest.approx(1.5)}
+
+    def test_unmatched_close_does_not_list_market(self):
+        trades = [
+            {"market_id": "m1", "side": "YES", "action": "OPEN",
+             "quantity": 10, "price": 0.40, "created_at_utc": "2026-01-10T12:00:00Z"},
+            {"market_id": "m2", "side": "NO", "action": "CLOSE",
+             "quantity": 5, "price": 0.60, "created_at_utc": "2026-01-10T13:00:00Z"},
+        ]
+        result = PaperTradingService._compute_market_pnl_breakdown(trades, {})
+        assert set(result) == {"m1"}
+
+
+class TestCarryForwardPrices:
+    """Test _carry_forward_prices expansion of sparse daily closes."""
+
+    def test_fills_gap_days(self):
+        closes = {
+            "2026-01-10": {"m1": {"yes_price": 0.4, "no_price": 0.6}},
+            "2026-01-12": {"m1": {"yes_price": 0.5, "no_price": 0.5}},
+        }
+        dates = ["2026-01-10", "2026-01-11", "2026-01-12"]
+        result = PaperTradingService._carry_forward_prices(closes, dates)
+        assert result["2026-01-11"]["m1"]["yes_price"] == 0.4
+        assert result["2026-01-12"]["m1"]["yes_price"] == 0.5
+
+    def test_merges_markets_across_days(self):
+        closes = {
+            "2026-01-10": {"m1": {"yes_price": 0.4, "no_price": 0.6}},
+            "2026-01-11": {"m2": {"yes_price": 0.7, "no_price": 0.3}},
+        }
+        result = PaperTradingService._carry_forward_prices(closes, ["2026-01-10", "2026-01-11"])
+        assert set(result["2026-01-10"]) == {"m1"}
+        assert set(result["2026-01-11"]) == {"m1", "m2"}
+
+    def test_earlier_closes_seed_state(self):
+        closes = {"2026-01-01": {"m1": {"yes_price": 0.3, "no_price": 0.7}}}
+        result = PaperTradingService._carry_forward_prices(closes, ["2026-01-10"])
+        assert result["2026-01-10"]["m1"]["yes_price"] == 0.3
+
+    def test_dates_before_any_price_omitted(self):
+        closes = {"2026-01-11": {"m1": {"yes_price": 0.3, "no_price": 0.7}}}
+        result = PaperTradingService._carry_forward_prices(closes, ["2026-01-10", "2026-01-11"])
+        assert list(result) == ["2026-01-11"]
+
+
 class TestComputePortfolioStats:
     """Test _compute_portfolio_stats static method."""
 
@@ -279,3 +427,74 @@ class TestComputePortfolioStats:
         stats = PaperTradingService._compute_portfolio_stats(trades, curve)
         assert stats.avg_win == pytest.approx(2.0)
         assert stats.avg_loss == pytest.approx(-1.0)
+
+
+class TestFifoReplay:
+    def test_fifo_close_partial_lot(self):
+        lots = deque([(10.0, 0.40), (5.0, 0.50)])
+        pnl = fifo_close(lots, 12.0, 0.60)
+        assert pnl == pytest.approx(10 * 0.20 + 2 * 0.10)
+        assert list(lots) == [(3.0, 0.50)]
+
+    def test_fifo_close_more_than_open(self):
+        lots = deque([(5.0, 0.40)])
+        assert fifo_close(lots, 8.0, 0.50) == pytest.approx(0.5)
+        assert not lots
+
+    def test_replay_keys_by_market_and_side(self):
+        trades = [
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 10, "price": 0.40},
+            {"market_id": "m1", "side": "NO", "action": "OPEN", "quantity": 10, "price": 0.70},
+            {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 10, "price": 0.50},
+        ]
+        close_pnls, open_lots = replay_fifo(trades)
+        assert close_pnls == [pytest.approx(1.0)]
+        assert list(open_lots[("m1", "NO")]) == [(10.0, 0.70)]
+        assert not open_lots[("m1", "YES")]
+
+
+class TestMarkToMarket:
+    def test_values_by_side_and_falls_back_to_cost(self):
+        unrealized, value = mark_to_market(
+            open_qty=np.array([10.0, 5.0, 0.0, 4.0]),
+            open_cost=np.array([4.0, 3.0, 0.0, 2.0]),
+            pos_mkt=np.array([0, 0, 1, 1]),
+            pos_yes=np.array([True, False, True, True]),
+            yes_px=np.array([0.7, np.nan]),
+            no_px=np.array([0.3, np.nan]),
+        )
+        # m0 YES: 10*0.7=7; m0 NO: 5*0.3=1.5; closed slot skipped; m1 unpriced → at cost 2
+        assert value == pytest.approx(10.5)
+        assert unrealized == pytest.approx(10.5 - 9.0)
+
+    def test_values_every_date_row_at_once(self):
+        open_qty = np.array([[10.0, 0.0], [10.0, 4.0]])
+        open_cost = np.array([[4.0, 0.0], [4.0, 2.0]])
+        yes_px = np.array([[0.5, np.nan], [0.6, 0.25]])
+        no_px = 1.0 - yes_px
+        unrealized, value = mark_to_market(
+            open_qty, open_cost, np.array([0, 1]), np.array([True, True]), yes_px, no_px
+        )
+        assert value == pytest.approx([5.0, 7.0])
+        assert unrealized == pytest.approx([1.0, 1.0])
+
+
+class TestLinearTrend:
+    def test_matches_linregress(self):
+        from scipy.stats import linregress
+
+        y = np.array([0.0, 0.4, 0.3, 1.1, 0.9, 1.6, 1.4, 2.2])
+        slope, r_squared, p_value = linear_trend(y)
+        ref = linregress(np.arange(len(y), dtype=np.float64), y)
+        assert slope == pytest.approx(ref.slope)
+        assert r_squared == pytest.approx(ref.rvalue ** 2)
+        assert p_value == pytest.approx(ref.pvalue)
+
+    def test_flat_series(self):
+        assert linear_trend(np.zeros(5)) == (0.0, 0.0, 1.0)
+
+    def test_perfect_line(self):
+        slope, r_squared, p_value = linear_trend(np.array([1.0, 3.0, 5.0, 7.0]))
+        assert slope == pytest.approx(2.0)
+        assert r_squared == pytest.approx(1.0)
+        assert p_value == 0.0
@@ -1,6 +1,12 @@
 """Tests for Trump keyword filtering and binary market detection."""
 
-from utils.filters import is_trump_related, is_binary_yes_no, normalize_yes_no_prices
+from utils.filters import (
+    is_trump_related,
+    is_trump_related_lowered,
+    is_binary_yes_no,
+    normalize_yes_no_prices,
+    trump_match_keywords,
+)
 
 
 class TestIsTrumpRelated:
@@ -41,6 +47,18 @@ class TestIsTrumpRelated:
         assert is_trump_related("President Trump visits Europe?", kws)
         assert not is_trump_related("Biden approval rating?", kws)
 
+    def test_longer_keyword_alone_still_required_in_full(self):
+        # "president trump" is only subsumed when "trump" is also a keyword
+        assert not is_trump_related("Trump rally?", ["president trump"])
+        assert is_trump_related("Trump rally?", ["president trump", "Trump"])
+
+    def test_lowered_variant_matches(self):
+        kws = trump_match_keywords(["DJT", "donald trump"])
+        assert kws == ("djt", "donald trump")
+        assert is_trump_related_lowered("djt stock above $50?", kws)
+        assert not is_trump_related_lowered("will trump win?", kws)
+        assert trump_match_keywords(None) == trump_match_keywords([])
+
 
 class TestIsBinaryYesNo:
     def test_valid_binary(self):
@@ -73,6 +91,12 @@ class TestIsBinaryYesNo:
     def test_invalid_price_count(self):
         assert not is_binary_yes_no(["Yes", "No"], ["0.65"])
 
+    def test_valid_no_first(self):
+        assert is_binary_yes_no(["No", "Yes"])
+
+    def test_invalid_duplicate_label(self):
+        assert not is_binary_yes_no(["Yes", " yes"])
+
 
 class TestNormalizeYesNoPrices:
     def test_yes_first(self):
@@ -0,0 +1,28 @@
+"""Tests for time-ordered ID generation."""
+
+import time
+import uuid
+
+from utils.ids import uuid7
+
+
+class TestUuid7:
+    def test_version_and_variant(self):
+        parsed = uuid.UUID(uuid7())
+        assert parsed.version == 7
+        assert parsed.variant == uuid.RFC_4122
+
+    def test_embeds_current_millis(self):
+        before = time.time_ns() // 1_000_000
+        ms = uuid.UUID(uuid7()).int >> 80
+        after = time.time_ns() // 1_000_000
+        assert before <= ms <= after
+
+    def test_sorts_by_creation_time(self):
+        first = uuid7()
+        time.sleep(0.002)
+        second = uuid7()
+        assert first < second
+
+    def test_unique(self):
+        assert len({uuid7() for _ in range(1000)}) == 1000
@@ -0,0 +1,37 @@
+"""Unit tests for spreadsheet import parsing — no ES dependency."""
+
+import openpyxl
+import pytest
+
+from import_spreadsheet import read_paper_trades
+
+
+def make_workbook(rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "paper_trades"
+    ws.append([
+        "trade_id", "created_at_utc", "market_id", "side", "action",
+        "quantity", "price", "snapshot_ts_utc", "fees", "metadata",
+    ])
+    for row in rows:
+        ws.append(row)
+    return wb
+
+
+class TestReadPaperTrades:
+    def test_open_trade_has_positive_notional(self):
+        wb = make_workbook([
+            ["t1", "2025-01-01T00:00:00Z", "123", "YES", "OPEN", 10, "0,45", None, 0, None],
+        ])
+        [doc] = read_paper_trades(wb)
+        assert doc["notional"] == pytest.approx(4.5)
+        assert doc["signed_notional"] == pytest.approx(4.5)
+
+    def test_close_trade_has_negative_signed_notional(self):
+        wb = make_workbook([
+            ["t2", "2025-01-02T00:00:00Z", "123", "YES", "CLOSE", 4, 0.6, None, 0, None],
+        ])
+        [doc] = read_paper_trades(wb)
+        assert doc["notional"] == pytest.approx(2.4)
+        assert doc["signed_notional"] == pytest.approx(-2.4)
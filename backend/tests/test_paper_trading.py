@@ -1,7 +1,19 @@
 """Tests for paper trading P&L calculations and snapshot selection logic."""
 
+import random
+from bisect import bisect_right
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
 import pytest
 
+from models.paper_trade import PaperTrade
+from services.paper_trading_service import (
+    PaperTradingService,
+    fifo_arrays,
+    fifo_trade_pnls,
+)
+
 
 def compute_unrealized_pnl(
     quantity: float, avg_entry_price: float, current_price: float
@@ -12,12 +24,10 @@ def compute_unrealized_pnl(
     return market_value - cost_basis
 
 
-def compute_realized_pnl_fifo(trades: list[dict]) -> float:
-    """Replicate FIFO realized P&L from PaperTradingService._compute_realized_pnl."""
-    from collections import defaultdict
-
-    open_tracker: dict[tuple, list[tuple[float, float]]] = defaultdict(list)
-    realized = 0.0
+def fifo_close_pnls(trades: list[dict]) -> list[float]:
+    """Independent FIFO reference: realized P&L of each CLOSE, in trade order."""
+    open_tracker: dict[tuple, deque[tuple[float, float]]] = defaultdict(deque)
+    close_pnls = []
 
     for t in trades:
         key = (t["market_id"], t["side"])
@@ -27,18 +37,32 @@ def compute_realized_pnl_fifo(trades: list[dict]) -> float:
         if t["action"] == "OPEN":
             open_tracker[key].append((qty, price))
         elif t["action"] == "CLOSE":
+            realized = 0.0
             remaining = qty
-            while remaining > 0 and open_tracker[key]:
-                open_qty, open_price = open_tracker[key][0]
+            lots = open_tracker[key]
+            while remaining > 0 and lots:
+                open_qty, open_price = lots[0]
                 matched = min(remaining, open_qty)
                 realized += matched * (price - open_price)
                 remaining -= matched
                 if matched >= open_qty:
-                    open_tracker[key].pop(0)
+                    lots.popleft()
                 else:
-                    open_tracker[key][0] = (open_qty - matched, open_price)
+                    lots[0] = (open_qty - matched, open_price)
+            close_pnls.append(realized)
+
+    return close_pnls
+
+
+def compute_realized_pnl_fifo(trades: list[dict]) -> float:
+    """Replicate FIFO realized P&L from PaperTradingService._compute_realized_pnl."""
+    return sum(fifo_close_pnls(trades))
 
-    return realized
+
+def assert_realized_pnl(trades: list[dict], expected: float) -> None:
+    """Both the reference replay and the service's kernel realize `expected`."""
+    assert compute_realized_pnl_fifo(trades) == pytest.approx(expected)
+    assert PaperTradingService._compute_realized_pnl(trades) == pytest.approx(expected)
 
 
 class TestUnrealizedPnL:
@@ -79,7 +103,7 @@ class TestRealizedPnLFifo:
             {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 10, "price": 0.40},
             {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 10, "price": 0.60},
         ]
-        assert compute_realized_pnl_fifo(trades) == pytest.approx(2.0)
+        assert_realized_pnl(trades, 2.0)
 
     def test_partial_close(self):
         """Open 10 at 0.40, close 5 at 0.60 → realized = 5 * 0.20 = 1.0."""
@@ -87,7 +111,7 @@ class TestRealizedPnLFifo:
             {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 10, "price": 0.40},
             {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 5, "price": 0.60},
         ]
-        assert compute_realized_pnl_fifo(trades) == pytest.approx(1.0)
+        assert_realized_pnl(trades, 1.0)
 
     def test_fifo_order(self):
         """Open 5 at 0.30, open 5 at 0.50, close 5 at 0.60 → FIFO uses 0.30 first."""
@@ -97,7 +121,7 @@ class TestRealizedPnLFifo:
             {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 5, "price": 0.60},
         ]
         # FIFO: close against 0.30 lot → 5 * (0.60 - 0.30) = 1.50
-        assert compute_realized_pnl_fifo(trades) == pytest.approx(1.5)
+        assert_realized_pnl(trades, 1.5)
 
     def test_loss_trade(self):
         """Open at 0.80, close at 0.50 → loss."""
@@ -105,14 +129,14 @@ class TestRealizedPnLFifo:
             {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 10, "price": 0.80},
             {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 10, "price": 0.50},
         ]
-        assert compute_realized_pnl_fifo(trades) == pytest.approx(-3.0)
+        assert_realized_pnl(trades, -3.0)
 
     def test_no_closes(self):
         """Only opens, no realized P&L."""
         trades = [
             {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 10, "price": 0.40},
         ]
-        assert compute_realized_pnl_fifo(trades) == pytest.approx(0.0)
+        assert_realized_pnl(trades, 0.0)
 
     def test_multiple_markets(self):
         """Two different markets with independent P&L."""
@@ -124,7 +148,66 @@ class TestRealizedPnLFifo:
         ]
         # m1: 10 * (0.60 - 0.40) = 2.0
         # m2: 5 * (0.20 - 0.30) = -0.5
-        assert compute_realized_pnl_fifo(trades) == pytest.approx(1.5)
+        assert_realized_pnl(trades, 1.5)
+
+    def test_interleaved_positions_keep_fifo_order(self):
+        """Trades of one position split across others still match oldest lot first."""
+        trades = [
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 5, "price": 0.30},
+            {"market_id": "m2", "side": "YES", "action": "OPEN", "quantity": 5, "price": 0.90},
+            {"market_id": "m1", "side": "NO", "action": "OPEN", "quantity": 5, "price": 0.70},
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 5, "price": 0.50},
+            {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 7, "price": 0.60},
+        ]
+        # m1 YES: 5 * (0.60 - 0.30) + 2 * (0.60 - 0.50) = 1.7
+        assert_realized_pnl(trades, 1.7)
+
+    def test_close_beyond_open_lots_ignores_excess(self):
+        """An over-sized CLOSE only realizes the lots that were open at the time."""
+        trades = [
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 5, "price": 0.40},
+            {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 8, "price": 0.60},
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 5, "price": 0.20},
+            {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 5, "price": 0.30},
+        ]
+        # 5 * (0.60 - 0.40) + 5 * (0.30 - 0.20) = 1.5
+        assert_realized_pnl(trades, 1.5)
+
+    def test_matches_reference_replay(self):
+        """The array kernel agrees with the reference replay on a mixed trade tape."""
+        rng = random.Random(7)
+        trades = [
+            {
+                "market_id": f"m{rng.randrange(4)}",
+                "side": rng.choice(["YES", "NO"]),
+                "action": rng.choice(["OPEN", "OPEN", "CLOSE"]),
+                "quantity": float(rng.randint(1, 20)),
+                "price": rng.random(),
+            }
+            for _ in range(500)
+        ]
+        expected = compute_realized_pnl_fifo(trades)
+        assert PaperTradingService._compute_realized_pnl(trades) == pytest.approx(expected)
+
+    def test_per_trade_pnls_match_reference_replay(self):
+        """Each CLOSE's kernel P&L matches the reference replay; OPENs realize nothing."""
+        trades = [
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 5, "price": 0.30},
+            {"market_id": "m2", "side": "NO", "action": "OPEN", "quantity": 4, "price": 0.50},
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 5, "price": 0.50},
+            {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 7, "price": 0.60},
+            {"market_id": "m2", "side": "NO", "action": "CLOSE", "quantity": 6, "price": 0.40},
+            {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 3, "price": 0.20},
+        ]
+        codes, is_open, qty, price = fifo_arrays(trades)
+        pnls = fifo_trade_pnls(codes, is_open, qty, price)
+        assert pnls[is_open] == pytest.approx([0.0, 0.0, 0.0])
+        # Positions are grouped in first-seen order: m1 YES closes, then m2 NO
+        close_pnls = fifo_close_pnls(trades)
+        assert pnls[~is_open] == pytest.approx([close_pnls[0], close_pnls[2], close_pnls[1]])
+
+    def test_empty(self):
+        assert_realized_pnl([], 0.0)
 
 
 class TestNearestSnapshotSelection:
@@ -140,8 +223,8 @@ class TestNearestSnapshotSelection:
             return None
         if target_ts is None:
             return snapshots[-1]  # latest
-        candidates = [s for s in snapshots if s["ts"] <= target_ts]
-        return candidates[-1] if candidates else None
+        i = bisect_right(snapshots, target_ts, key=lambda s: s["ts"])
+        return snapshots[i - 1] if i else None
 
     def test_latest_when_no_timestamp(self):
         snaps = [{"ts": 1, "price": 0.5}, {"ts": 2, "price": 0.6}, {"ts": 3, "price": 0.7}]
@@ -166,3 +249,116 @@ class TestNearestSnapshotSelection:
     def test_empty_snapshots(self):
         result = self._select_nearest([], target_ts=2)
         assert result is None
+
+    def test_duplicate_timestamps_pick_last(self):
+        snaps = [{"ts": 1, "price": 0.5}, {"ts": 2, "price": 0.6}, {"ts": 2, "price": 0.65}]
+        assert self._select_nearest(snaps, target_ts=2)["price"] == 0.65
+
+    def test_query_body_filters_and_seeks(self):
+        ts = datetime(2026, 1, 15, tzinfo=timezone.utc)
+        body = PaperTradingService._nearest_snapshot_body("m1", ts)
+        assert body["query"] == {"bool": {"filter": [
+            {"term": {"market_id": "m1"}},
+            {"range": {"timestamp_utc": {"lte": ts.isoformat()}}},
+        ]}}
+        assert body["sort"] == [{"timestamp_utc": {"order": "desc"}}]
+        assert body["size"] == 1
+
+
+class TestPositionsFromBuckets:
+    @staticmethod
+    def _bucket(mid, side, open_qty, open_notional, close_qty, close_notional, last=None):
+        last_trade = {"value": None} if last is None else {"value": 0, "value_as_string": last}
+        return {
+            "key": {"market_id": mid, "side": side},
+            "open": {"quantity": {"value": open_qty}, "notional": {"value": open_notional}},
+            "close": {"quantity": {"value": close_qty}, "notional": {"value": close_notional}},
+            "last_trade": last_trade,
+        }
+
+    def test_net_quantity_and_avg_entry(self):
+        buckets = [self._bucket("m1", "YES", 20.0, 9.0, 5.0, 3.0, "2026-01-12")]
+        pos = PaperTradingService._positions_from_buckets(buckets)[("m1", "YES")]
+        assert pos["net_quantity"] == pytest.approx(15.0)
+        assert pos["avg_entry_price"] == pytest.approx(0.45)
+        assert pos["close_revenue"] == pytest.approx(3.0)
+        assert pos["last_trade_date"] == "2026-01-12"
+
+    def test_no_opens(self):
+        buckets = [self._bucket("m1", "NO", 0.0, 0.0, 5.0, 2.5)]
+        pos = PaperTradingService._positions_from_buckets(buckets)[("m1", "NO")]
+        assert pos["avg_entry_price"] == 0.0
+        assert pos["net_quantity"] == pytest.approx(-5.0)
+        assert pos["last_trade_date"] == ""
+
+
+class TestTradeDoc:
+    @staticmethod
+    def _trade(action: str) -> PaperTrade:
+        return PaperTrade(
+            trade_id="t1",
+            created_at_utc=datetime(2026, 1, 10, tzinfo=timezone.utc),
+            market_id="m1",
+            side="YES",
+            action=action,
+            quantity=10,
+            price=0.45,
+        )
+
+    def test_open_notional_positive(self):
+        doc = PaperTradingService._trade_doc(self._trade("OPEN"))
+        assert doc["notional"] == pytest.approx(4.5)
+        assert doc["signed_notional"] == pytest.approx(4.5)
+        assert doc["trade_id"] == "t1"
+        assert doc["created_at_utc"] == datetime(2026, 1, 10, tzinfo=timezone.utc)
+
+    def test_close_signed_notional_negative(self):
+        doc = PaperTradingService._trade_doc(self._trade("CLOSE"))
+        assert doc["notional"] == pytest.approx(4.5)
+        assert doc["signed_notional"] == pytest.approx(-4.5)
+
+
+class TestBuildTrade:
+    SNAPSHOT = {"yes_price": 0.35, "no_price": 0.65, "timestamp_utc": "2026-01-10T00:00:00.000Z"}
+
+    def test_priced_by_side(self):
+        yes = PaperTradingService._build_trade("OPEN", "m1", "yes", 10, self.SNAPSHOT, 0.0)
+        no = PaperTradingService._build_trade("OPEN", "m1", "NO", 10, self.SNAPSHOT, 0.0)
+        assert (yes.side, yes.price) == ("YES", 0.35)
+        assert (no.side, no.price) == ("NO", 0.65)
+        assert yes.snapshot_ts_utc == datetime(2026, 1, 10, tzinfo=timezone.utc)
+
+    def test_unique_ids(self):
+        trades = [
+            PaperTradingService._build_trade("CLOSE", "m1", "YES", 1, self.SNAPSHOT, 0.0)
+            for _ in range(50)
+        ]
+        assert len({t.trade_id for t in trades}) == 50
+        assert all(t.action == "CLOSE" for t in trades)
+
+
+class TestNetPositions:
+    def test_nets_opens_and_closes_up_to_end_date(self):
+        trades = [
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 10, "price": 0.40, "created_at_utc": "2026-01-10T00:00:00Z"},
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 10, "price": 0.60, "created_at_utc": "2026-01-11T00:00:00Z"},
+            {"market_id": "m1", "side": "YES", "action": "CLOSE", "quantity": 5, "price": 0.70, "created_at_utc": "2026-01-12T00:00:00Z"},
+            {"market_id": "m2", "side": "NO", "action": "OPEN", "quantity": 4, "price": 0.50, "created_at_utc": "2026-01-12T00:00:00Z"},
+            {"market_id": "m2", "side": "NO", "action": "CLOSE", "quantity": 4, "price": 0.55, "created_at_utc": "2026-01-13T00:00:00Z"},
+            {"market_id": "m3", "side": "YES", "action": "OPEN", "quantity": 7, "price": 0.20, "created_at_utc": "2026-06-01T00:00:00Z"},
+        ]
+        positions = PaperTradingService._net_positions(trades, "2026-05-01")
+        assert set(positions) == {("m1", "YES")}
+        pos = positions[("m1", "YES")]
+        assert pos["net_quantity"] == pytest.approx(15.0)
+        assert pos["avg_entry_price"] == pytest.approx(0.50)
+        assert pos["last_trade_date"] == "2026-01-12"
+
+    def test_trades_on_end_date_are_included(self):
+        trades = [
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 3, "price": 0.40, "created_at_utc": "2026-05-01T23:59:59Z"},
+            {"market_id": "m1", "side": "YES", "action": "OPEN", "quantity": 3, "price": 0.40, "created_at_utc": "2026-05-02T00:00:00Z"},
+        ]
+        positions = PaperTradingService._net_positions(trades, "2026-05-01")
+        assert positions[("m1", "YES")]["net_quantity"] == pytest.approx(3.0)
+        assert positions[("m1", "YES")]["last_trade_date"] == "2026-05-01"
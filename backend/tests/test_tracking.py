@@ -0,0 +1,46 @@
+"""Unit tests for TrackingService bulk writes against an in-memory ES double."""
+
+import asyncio
+
+import pytest
+
+from models.tracking import TrackedMarketUpdate
+from services.tracking_service import TrackingService
+
+
+class BulkResultES:
+    """Answers mget with no existing configs and bulk_index with fixed ok flags."""
+
+    def __init__(self, ok: list[bool]):
+        self.ok = ok
+
+    async def mget(self, index, ids):
+        return {}
+
+    async def bulk_index(self, index, docs, id_field=None, refresh=False):
+        errors = self.ok.count(False)
+        return {"success": len(self.ok) - errors, "errors": errors, "ok": self.ok}
+
+
+UPDATES = {
+    "m1": TrackedMarketUpdate(is_tracked=True),
+    "m2": TrackedMarketUpdate(is_tracked=True),
+    "m3": TrackedMarketUpdate(is_tracked=False),
+}
+
+
+class TestSetMany:
+    def test_returns_all_when_all_written(self):
+        svc = TrackingService(BulkResultES([True, True, True]))
+        assert list(asyncio.run(svc.set_many(UPDATES))) == ["m1", "m2", "m3"]
+
+    def test_partial_failure_returns_only_written(self):
+        svc = TrackingService(BulkResultES([True, False, True]))
+        result = asyncio.run(svc.set_many(UPDATES))
+        assert list(result) == ["m1", "m3"]
+        assert result["m3"]["is_tracked"] is False
+
+    def test_raises_when_nothing_written(self):
+        svc = TrackingService(BulkResultES([False, False, False]))
+        with pytest.raises(RuntimeError):
+            asyncio.run(svc.set_many(UPDATES))
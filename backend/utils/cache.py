@@ -0,0 +1,69 @@
+"""In-process TTL cache decorator for async service methods."""
+
+import asyncio
+import functools
+import time
+
+
+def ttl_cache(ttl_seconds: float):
+    """Decorator: cache an async method's result per instance + args for ttl_seconds.
+
+    Concurrent misses for the same key share a per-key lock, so only one call
+    reaches ES while misses on other keys proceed in parallel. Expired entries are
+    pruned whenever a new one is stored. Call `<method>.invalidate(instance)` to
+    drop the instance's cached entries; misses already in flight then return their
+    result without caching it, since it may predate the write that invalidated.
+    """
+
+    def decorator(func):
+        attr = f"_ttl_cache_{func.__name__}"
+
+        def _state(instance) -> dict:
+            state = instance.__dict__.get(attr)
+            if state is None:
+                # locks: key -> [Lock, number of callers using it]
+                state = {"entries": {}, "locks": {}, "generation": 0}
+                instance.__dict__[attr] = state
+            return state
+
+        def _store(entries: dict, key, value) -> None:
+            now = time.monotonic()
+            for stale in [k for k, (expires, _) in entries.items() if expires <= now]:
+                del entries[stale]
+            entries[key] = (now + ttl_seconds, value)
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            state = _state(self)
+            entries = state["entries"]
+            key = (args, tuple(sorted(kwargs.items())))
+            entry = entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            slot = state["locks"].setdefault(key, [asyncio.Lock(), 0])
+            slot[1] += 1
+            try:
+                async with slot[0]:
+                    entry = entries.get(key)
+                    if entry and entry[0] > time.monotonic():
+                        return entry[1]
+                    generation = state["generation"]
+                    value = await func(self, *args, **kwargs)
+                    if generation == state["generation"]:
+                        _store(entries, key, value)
+                    return value
+            finally:
+                slot[1] -= 1
+                if not slot[1]:
+                    del state["locks"][key]
+
+        def invalidate(instance) -> None:
+            state = instance.__dict__.get(attr)
+            if state is not None:
+                state["entries"].clear()
+                state["generation"] += 1
+
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
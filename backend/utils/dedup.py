@@ -1,24 +1,54 @@
 """Deterministic document ID generation for snapshot deduplication."""
 
-from datetime import datetime, timezone
+from datetime import datetime
 
+import numpy as np
 
-def generate_snapshot_doc_id(timestamp_utc: datetime, market_id: str) -> str:
+
+def format_snapshot_ts(timestamp_utc: datetime) -> str:
+    """Format a timestamp as the second-precision prefix used in snapshot doc_ids.
+
+    Naive datetimes are taken as UTC. The first 19 characters of isoformat() are
+    the wall-clock fields whether or not tzinfo is set, so no replace() is needed.
+    """
+    return timestamp_utc.isoformat(timespec="seconds")[:19] + "Z"
+
+
+def generate_snapshot_doc_id(
+    timestamp_utc: datetime, market_id: str, ts_str: str | None = None
+) -> str:
     """Generate deterministic doc_id: '{ISO timestamp}|{market_id}'.
 
     Uses second-level precision. The same timestamp+market_id always produces
-    the same doc_id, so ES will reject duplicates automatically.
+    the same doc_id, so ES will reject duplicates automatically. Callers that
+    build many IDs for one timestamp can pass `ts_str` from format_snapshot_ts
+    to skip re-formatting it per market.
     """
-    if timestamp_utc.tzinfo is None:
-        timestamp_utc = timestamp_utc.replace(tzinfo=timezone.utc)
-    ts_str = timestamp_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if ts_str is None:
+        ts_str = format_snapshot_ts(timestamp_utc)
     return f"{ts_str}|{market_id}"
 
 
+def format_snapshot_ts_array(timestamps: np.ndarray) -> np.ndarray:
+    """format_snapshot_ts for a whole array of UTC timestamps in one NumPy conversion.
+
+    Accepts datetime64 values or integer epoch seconds; datetime64[s] renders as
+    YYYY-MM-DDTHH:MM:SS, so only the trailing "Z" is appended.
+    """
+    return np.char.add(np.asarray(timestamps).astype("datetime64[s]").astype(str), "Z")
+
+
+def generate_snapshot_doc_ids(
+    timestamps: np.ndarray, market_ids: np.ndarray | str, ts_strs: np.ndarray | None = None
+) -> np.ndarray:
+    """Vectorized generate_snapshot_doc_id; market_ids may be one id for every row."""
+    if ts_strs is None:
+        ts_strs = format_snapshot_ts_array(timestamps)
+    return np.char.add(np.char.add(ts_strs, "|"), market_ids)
+
+
 def parse_snapshot_doc_id(doc_id: str) -> tuple[datetime, str]:
     """Parse a snapshot doc_id back into (timestamp_utc, market_id)."""
     ts_str, market_id = doc_id.split("|", 1)
-    timestamp = datetime.strptime(ts_str, "%Y-%m-%dT%H:%M:%SZ").replace(
-        tzinfo=timezone.utc
-    )
-    return timestamp, market_id
+    # fromisoformat reads the trailing "Z" as UTC (Python 3.11+)
+    return datetime.fromisoformat(ts_str), market_id
@@ -1,4 +1,6 @@
-"""Trump keyword matching and binary market detection utilities."""
+"""Trump keyword matching, binary market detection, and snapshot price utilities."""
+
+from functools import lru_cache
 
 DEFAULT_TRUMP_KEYWORDS = [
     "trump",
@@ -10,32 +12,85 @@ DEFAULT_TRUMP_KEYWORDS = [
 ]
 
 
+@lru_cache(maxsize=32)
+def _match_keywords(keywords: tuple[str, ...]) -> tuple[str, ...]:
+    """Lowercased keywords with any that contain another keyword dropped.
+
+    A question containing "donald trump" also contains "trump", so only the
+    shortest keyword of each such chain needs scanning for.
+    """
+    lowered = set(k.lower() for k in keywords if k)
+    return tuple(sorted(
+        k for k in lowered if not any(other != k and other in k for other in lowered)
+    ))
+
+
+_DEFAULT_KEYWORDS = _match_keywords(tuple(DEFAULT_TRUMP_KEYWORDS))
+
+
+def trump_match_keywords(keywords: list[str] | None = None) -> tuple[str, ...]:
+    """Normalized keyword set for is_trump_related_lowered (defaults if none given)."""
+    return _match_keywords(tuple(keywords)) if keywords else _DEFAULT_KEYWORDS
+
+
+def is_trump_related_lowered(question_lower: str, keywords: tuple[str, ...]) -> bool:
+    """is_trump_related for an already-lowercased question and trump_match_keywords() set.
+
+    Lets a caller filtering many questions lowercase each once and normalize the
+    keyword list once per run.
+    """
+    for keyword in keywords:
+        if keyword in question_lower:
+            return True
+    return False
+
+
 def is_trump_related(question: str, keywords: list[str] | None = None) -> bool:
-    """Check if a market question contains any Trump-related keyword (case-insensitive)."""
+    """Check if a market question contains any Trump-related keyword (case-insensitive).
+
+    The question is lowercased once and scanned with plain substring checks, which
+    beat a case-insensitive regex alternation on short strings.
+    """
     if not question:
         return False
-    kws = keywords or DEFAULT_TRUMP_KEYWORDS
-    question_lower = question.lower()
-    return any(kw.lower() in question_lower for kw in kws)
+    return is_trump_related_lowered(question.lower(), trump_match_keywords(keywords))
 
 
 def is_binary_yes_no(outcomes: list[str] | None, outcome_prices: list | None = None) -> bool:
     """Check if a market is a binary Yes/No market with prices present."""
     if not outcomes or len(outcomes) != 2:
         return False
-    labels = {o.strip().lower() for o in outcomes}
-    if labels != {"yes", "no"}:
-        return False
     if outcome_prices is not None and len(outcome_prices) != 2:
         return False
-    return True
+    a, b = outcomes
+    # Gamma sends the canonical labels almost always; only normalize when it doesn't
+    if (a == "Yes" and b == "No") or (a == "No" and b == "Yes"):
+        return True
+    return {a.strip().lower(), b.strip().lower()} == {"yes", "no"}
 
 
 def normalize_yes_no_prices(
     outcomes: list[str], outcome_prices: list[str | float]
 ) -> tuple[float, float]:
     """Return (yes_price, no_price) regardless of outcome order in the API response."""
-    prices = [float(p) for p in outcome_prices]
-    if outcomes[0].strip().lower() == "yes":
-        return prices[0], prices[1]
-    return prices[1], prices[0]
+    prices = (float(outcome_prices[0]), float(outcome_prices[1]))
+    # bool index: 0 when the first outcome is Yes, 1 when the order is flipped
+    no_first = outcomes[0].strip().lower() != "yes"
+    return prices[no_first], prices[not no_first]
+
+
+def build_price_fields(yes_price: float, no_price: float) -> dict:
+    """Return the price/cents/spread fields shared by every snapshot doc.
+
+    Prices are non-negative, so int(x * 100 + 0.5) rounds half-up to cents
+    without going through round()'s banker's rounding.
+    """
+    yes = round(yes_price, 6)
+    no = round(no_price, 6)
+    return {
+        "yes_price": yes,
+        "no_price": no,
+        "yes_cents": int(yes * 100 + 0.5),
+        "no_cents": int(no * 100 + 0.5),
+        "spread": abs(yes - no),
+    }
@@ -0,0 +1,18 @@
+"""Time-ordered document ID generation."""
+
+import os
+import time
+import uuid
+
+
+def uuid7() -> str:
+    """Return a UUIDv7 string: 48-bit unix-ms timestamp followed by random bits.
+
+    IDs sort by creation time, so new trade _ids append to the end of the
+    index's term dictionary instead of landing at random positions.
+    """
+    ms = time.time_ns() // 1_000_000
+    value = (ms & ((1 << 48) - 1)) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
@@ -4,12 +4,29 @@ import asyncio
 import functools
 import logging
 
+import httpx
+
 logger = logging.getLogger(__name__)
 
 
+def _status_code(exc: Exception) -> int | None:
+    """HTTP status carried by an exception (directly or on its response), if any."""
+    # The Gamma/CLOB clients raise httpx.HTTPStatusError, which always has a response
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    if (status := getattr(exc, "status_code", None)) is not None:
+        return status
+    if (response := getattr(exc, "response", None)) is not None:
+        return getattr(response, "status_code", None)
+    return None
+
+
 def retry_with_backoff(max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
     """Decorator: retry an async function with exponential backoff."""
 
+    # Delay before retry n (1-based) is delays[n - 1]; fixed once per decoration
+    delays = tuple(min(base_delay * (2 ** i), max_delay) for i in range(max_attempts - 1))
+
     def decorator(func):
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
@@ -24,12 +41,9 @@ def retry_with_backoff(max_attempts: int = 3, base_delay: float = 1.0, max_delay
                             "%s failed after %d attempts: %s", func.__name__, max_attempts, exc
                         )
                         raise
-                    delay = min(base_delay * (2 ** (attempt - 1)), max_delay)
+                    delay = delays[attempt - 1]
                     # Special handling for 429 rate limits
-                    status_code = getattr(exc, "status_code", None) or getattr(
-                        getattr(exc, "response", None), "status_code", None
-                    )
-                    if status_code == 429:
+                    if _status_code(exc) == 429:
                         delay = max(delay, 10.0)
                     logger.warning(
                         "%s attempt %d/%d failed (%s), retrying in %.1fs",